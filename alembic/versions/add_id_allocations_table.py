@@ -0,0 +1,26 @@
+"""Add id_allocations table for write-behind id reservation
+
+Revision ID: add_id_allocations_table
+Revises: add_user_auth_tables
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_id_allocations_table'
+down_revision = 'add_user_auth_tables'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Next unreserved id per table; only used on backends without sequences
+    op.create_table(
+        'id_allocations',
+        sa.Column('name', sa.String(), nullable=False, primary_key=True),
+        sa.Column('next_id', sa.Integer(), nullable=False)
+    )
+
+def downgrade():
+    op.drop_table('id_allocations')
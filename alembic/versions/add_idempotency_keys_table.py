@@ -0,0 +1,30 @@
+"""Store /predict outcomes by Idempotency-Key for replay across workers
+
+Revision ID: add_idempotency_keys_table
+Revises: add_result_model_version
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_idempotency_keys_table'
+down_revision = 'add_result_model_version'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('response', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_idempotency_keys_created_at', 'idempotency_keys', ['created_at'])
+
+def downgrade():
+    op.drop_index('ix_idempotency_keys_created_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
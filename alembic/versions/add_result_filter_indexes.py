@@ -0,0 +1,27 @@
+"""Add indexes for the /results filter and pagination queries
+
+Revision ID: add_result_filter_indexes
+Revises: add_id_allocations_table
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_result_filter_indexes'
+down_revision = 'add_id_allocations_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Keyset pages are ordered by (created_at, id); city/category filters lead
+    op.create_index('ix_prediction_results_created_at', 'prediction_results', ['created_at'])
+    op.create_index('ix_prediction_results_city_created_at', 'prediction_results',
+                    ['city', 'created_at'])
+    op.create_index('ix_prediction_results_category_created_at', 'prediction_results',
+                    ['predicted_category', 'created_at'])
+
+def downgrade():
+    op.drop_index('ix_prediction_results_category_created_at', table_name='prediction_results')
+    op.drop_index('ix_prediction_results_city_created_at', table_name='prediction_results')
+    op.drop_index('ix_prediction_results_created_at', table_name='prediction_results')
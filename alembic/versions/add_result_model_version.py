@@ -0,0 +1,26 @@
+"""Record the model version with each prediction result
+
+Revision ID: add_result_model_version
+Revises: add_result_rollups_table
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_result_model_version'
+down_revision = 'add_result_rollups_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # The app adds this column itself at startup; skip it if that already happened
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns('prediction_results')}
+    if 'model_version' in columns:
+        return
+    # Nullable: rows written before versioning have no recorded model
+    op.add_column('prediction_results', sa.Column('model_version', sa.String(), nullable=True))
+
+def downgrade():
+    op.drop_column('prediction_results', 'model_version')
@@ -0,0 +1,36 @@
+"""Add result_rollups aggregate table and backfill it
+
+Revision ID: add_result_rollups_table
+Revises: add_result_filter_indexes
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_result_rollups_table'
+down_revision = 'add_result_filter_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'result_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('predicted_category', sa.String(), nullable=False),
+        sa.Column('city_tier', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('bmi_sum', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'predicted_category', 'city_tier')
+    )
+    # Backfill from existing predictions; later inserts keep it current
+    day = "date(created_at)" if op.get_bind().dialect.name == "sqlite" else "CAST(created_at AS DATE)"
+    op.execute(
+        "INSERT INTO result_rollups (day, predicted_category, city_tier, count, bmi_sum) "
+        f"SELECT {day}, predicted_category, city_tier, count(*), sum(bmi) FROM prediction_results "
+        f"GROUP BY {day}, predicted_category, city_tier"
+    )
+
+def downgrade():
+    op.drop_table('result_rollups')
@@ -0,0 +1,309 @@
+"""HTTP load test of the API against a seeded database.
+
+Seeds `prediction_results` (and its rollups) with synthetic rows, starts the
+API with uvicorn on that database, then drives each scenario at each
+concurrency level for a fixed time and reports throughput and latency
+percentiles:
+
+    python -m benchmarks.load --rows 10k --json baseline.json
+    python -m benchmarks.load --rows 1m --concurrency 1 16 64 --baseline baseline.json
+    python -m benchmarks.load --rows 10m --database-url postgresql://user:pw@localhost/bench
+
+A database that already holds at least `--rows` rows is reused as is, so
+large datasets are only seeded once (pass a `--database-url`; the default is
+a throwaway SQLite file). Against a server that is already running, pass
+`--url` and no seeding or server start happens.
+
+With `--baseline`, each result is compared with the same scenario and
+concurrency in an earlier `--json` file. The exit status is 1 when
+throughput dropped or p99 latency grew by more than `--tolerance`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import numpy as np
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import make_url
+
+from benchmarks.seed import CATEGORIES, CITIES, OCCUPATIONS, seed_results
+from insuremate.db.models import PredictionResult
+from insuremate.db.rollups import rebuild_rollups
+
+SCENARIOS = {
+    "predict": "POST /predict, one applicant per request",
+    "predict_burst": "POST /predict, all clients at once, then a pause",
+    "predict_batch": "POST /predict/batch with 100 applicants",
+    "results_page": "GET /results?limit=100",
+    "results_city_page": "GET /results/city/{busiest}?limit=100",
+    "results_city_full": "GET /results/city/{rarest} (full listing)",
+    "results_category_page": "GET /results/category/{category}?limit=100",
+    "results_ndjson": "GET /results/city/{rarest}?format=ndjson",
+    "results_export": "GET /results/export, CSV of one day",
+    "results_stats": "GET /results/stats",
+    "results_recent": "GET /results/recent",
+}
+BURST_PAUSE = 0.2
+
+
+def parse_rows(value: str) -> int:
+    """'10k' -> 10000, '1m' -> 1000000, or a plain integer."""
+    value = value.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * scale)
+
+
+def applicant(rng: random.Random) -> dict:
+    # The bundled model's encoder has no 'middle-aged' (45-59) category and
+    # refuses those applicants; keep error counts meaningful by skipping them
+    return {
+        "age": rng.choice([rng.randint(18, 44), rng.randint(60, 80)]),
+        "weight": round(rng.uniform(45, 120), 1),
+        "height": round(rng.uniform(1.45, 2.0), 2),
+        "income_lpa": round(rng.uniform(1, 50), 2),
+        "smoker": rng.random() < 0.2,
+        "city": rng.choice(CITIES[:60]),
+        "occupation": rng.choice(OCCUPATIONS),
+    }
+
+
+def prepare_database(url: str, rows: int) -> None:
+    engine = create_engine(url)
+    table = PredictionResult.__table__
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(table)).scalar_one() \
+            if engine.dialect.has_table(conn, table.name) else 0
+    if existing >= rows:
+        print(f"Reusing {existing} rows in {engine.dialect.name}")
+    else:
+        if existing:
+            print(f"{table.name} has {existing} rows, fewer than {rows}; use an empty database",
+                  file=sys.stderr)
+            raise SystemExit(1)
+        start = time.perf_counter()
+        seed_results(engine, rows)
+        buckets = rebuild_rollups(engine)
+        print(f"Seeded {rows} rows ({buckets} rollup buckets) into {engine.dialect.name} "
+              f"in {time.perf_counter() - start:.1f}s")
+    engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, workers: int, timeout: float = 300.0):
+    port = _free_port()
+    env = {**os.environ, "DATABASE_URL": database_url}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "insuremate.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with status {process.returncode}")
+        try:
+            if httpx.get(f"{url}/ready", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("Server did not become ready in time")
+
+
+def _targets(database_url: str | None) -> dict:
+    """Query parameters that exercise realistic paths through the data."""
+    busiest, rarest, day = CITIES[0], CITIES[-1], datetime.utcnow() - timedelta(days=1)
+    if database_url:
+        engine = create_engine(database_url)
+        table = PredictionResult.__table__
+        with engine.connect() as conn:
+            latest = conn.execute(select(func.max(table.c.created_at))).scalar()
+        engine.dispose()
+        if latest is not None:
+            day = latest - timedelta(days=1)
+    return {"busiest": busiest, "rarest": rarest, "category": CATEGORIES[2],
+            "since": day.isoformat(), "until": (day + timedelta(days=1)).isoformat()}
+
+
+def _request(client: httpx.AsyncClient, scenario: str, targets: dict, rng: random.Random):
+    if scenario in ("predict", "predict_burst"):
+        return client.post("/predict", json=applicant(rng))
+    if scenario == "predict_batch":
+        return client.post("/predict/batch", json=[applicant(rng) for _ in range(100)])
+    paths = {
+        "results_page": ("/results", {"limit": 100}),
+        "results_city_page": (f"/results/city/{targets['busiest']}", {"limit": 100}),
+        "results_city_full": (f"/results/city/{targets['rarest']}", {}),
+        "results_category_page": (f"/results/category/{targets['category']}", {"limit": 100}),
+        "results_ndjson": (f"/results/city/{targets['rarest']}", {"format": "ndjson"}),
+        "results_export": ("/results/export", {"since": targets["since"], "until": targets["until"]}),
+        "results_stats": ("/results/stats", {}),
+        "results_recent": ("/results/recent", {}),
+    }
+    path, params = paths[scenario]
+    return client.get(path, params=params)
+
+
+async def run_scenario(url: str, scenario: str, concurrency: int, duration: float, targets: dict) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def one(rng):
+            nonlocal errors
+            start = time.perf_counter()
+            try:
+                response = await _request(client, scenario, targets, rng)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+        async def client_loop(seed, deadline):
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                await one(rng)
+
+        # Short warmup so connection setup is not measured
+        await asyncio.gather(*(one(random.Random(-i)) for i in range(concurrency)))
+        latencies.clear()
+        errors = 0
+
+        start = time.perf_counter()
+        deadline = start + duration
+        if scenario == "predict_burst":
+            rng = random.Random(0)
+            while time.perf_counter() < deadline:
+                await asyncio.gather(*(one(rng) for _ in range(concurrency)))
+                await asyncio.sleep(BURST_PAUSE)
+        else:
+            await asyncio.gather(*(client_loop(i, deadline) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """Describe every result that regressed against `baseline` by more than `tolerance`."""
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'scenario':<24}{'conc':>5}{'rps before':>12}{'rps now':>10}{'p99 before':>12}{'p99 now':>10}")
+    for result in results:
+        old = before.get((result["scenario"], result["concurrency"]))
+        if old is None:
+            continue
+        print(f"{result['scenario']:<24}{result['concurrency']:>5}{old['throughput_rps']:>12.1f}"
+              f"{result['throughput_rps']:>10.1f}{old['p99_ms']:>12.1f}{result['p99_ms']:>10.1f}")
+        if result["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{result['scenario']} x{result['concurrency']}: throughput "
+                               f"{old['throughput_rps']} -> {result['throughput_rps']} req/s")
+        if result["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{result['scenario']} x{result['concurrency']}: p99 "
+                               f"{old['p99_ms']} -> {result['p99_ms']} ms")
+    return regressions
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=parse_rows, default=parse_rows("10k"),
+                        help="rows to seed, e.g. 10k, 1m, 10m")
+    parser.add_argument("--database-url", help="database to seed or reuse (default: temporary SQLite file)")
+    parser.add_argument("--url", help="benchmark this running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario and level")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--baseline", type=Path, help="compare with the results in this file")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed relative throughput drop / p99 increase (default 0.15)")
+    args = parser.parse_args(argv)
+
+    tmpdir = server = None
+    database_url = args.database_url
+    if args.url is None:
+        if database_url is None:
+            tmpdir = tempfile.TemporaryDirectory()
+            database_url = f"sqlite:///{Path(tmpdir.name) / 'bench.db'}"
+        prepare_database(database_url, args.rows)
+        server, url = start_server(database_url, args.workers)
+    else:
+        url = args.url.rstrip("/")
+
+    results = []
+    try:
+        targets = _targets(database_url)
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                result = asyncio.run(run_scenario(url, scenario, concurrency, args.duration, targets))
+                results.append(result)
+                print(f"{scenario:<24} x{concurrency:<4} {result['throughput_rps']:>9.1f} req/s  "
+                      f"p50 {result['p50_ms']:>8.1f}  p95 {result['p95_ms']:>8.1f}  "
+                      f"p99 {result['p99_ms']:>8.1f} ms  errors {result['errors']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=60)
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    report = {
+        "commit": _git_commit(),
+        "started_at": datetime.utcnow().isoformat(),
+        "rows": args.rows,
+        "database": make_url(database_url).get_backend_name() if database_url else None,
+        "workers": args.workers,
+        "duration": args.duration,
+        "results": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
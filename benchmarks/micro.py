@@ -0,0 +1,196 @@
+"""Micro-benchmarks of the prediction pipeline's internal stages.
+
+Times each stage in isolation with `timeit` (median of `--repeat` runs, GC
+disabled) and measures its memory with `tracemalloc`: the peak allocated
+while one call runs and what is still allocated after it returns (its
+result included).
+
+    python -m benchmarks.micro --json micro.json
+    python -m benchmarks.micro --baseline micro.json        # exit 1 on regression
+    python -m benchmarks.micro --filter model_predict
+
+Stages: `Userinput` construction and validation, each computed field,
+feature extraction, DataFrame building, the model pipeline and the active
+inference engine at batch sizes 1 to 10k, `save_prediction_result` (against
+a throwaway SQLite database unless `--database-url` is given) and
+reading result pages and encoding them as JSON.
+
+Timings are only comparable between runs on the same machine; the JSON
+report records the commit, Python version and platform for that reason.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+
+
+def _cases(database_url: str) -> list[tuple[str, callable]]:
+    """(name, zero-argument callable) for every stage.
+
+    Imports the app lazily so DATABASE_URL is set before its engine is built.
+    """
+    os.environ["DATABASE_URL"] = database_url
+    import pandas as pd
+    from sqlalchemy import create_engine
+
+    from benchmarks.seed import seed_results
+    from insuremate.api.results import _dumps, _format_results
+    from insuremate.db import crud
+    from insuremate.db.base import Base
+    from insuremate.db.session import engine
+    from insuremate.schemas import Userinput
+    from insuremate.services import predict
+
+    Base.metadata.create_all(bind=engine)
+    model = predict.get_model()
+    loaded = predict.REGISTRY.current
+    # The bundled model refuses 'middle-aged' applicants; keep every row scorable
+    users = [u for u in predict.synthetic_users(max(BATCH_SIZES) * 2, seed=11) if u.age_group != "middle-aged"]
+    records = [u.model_dump(include=set(Userinput.model_fields)) for u in users]
+    user, record = users[0], records[0]
+
+    cases = [
+        ("userinput_construct", lambda: Userinput(**record)),
+        ("userinput_model_validate", lambda: Userinput.model_validate(record)),
+        ("computed_bmi", lambda: user.bmi),
+        ("computed_lifestyle_risk", lambda: user.lifestyle_risk),
+        ("computed_age_group", lambda: user.age_group),
+        ("computed_city_tier", lambda: user.city_tier),
+        ("features_row", lambda: predict._features(user)),
+    ]
+    for n in BATCH_SIZES:
+        batch = users[:n]
+        columns = predict._derive_feature_columns(batch)
+        frame = pd.DataFrame({name: columns[name] for name in predict.FEATURE_COLUMNS})
+        cases += [
+            (f"derive_columns[{n}]", lambda batch=batch: predict._derive_feature_columns(batch)),
+            (f"dataframe_build[{n}]",
+             lambda columns=columns: pd.DataFrame({name: columns[name] for name in predict.FEATURE_COLUMNS})),
+            (f"model_predict[{n}]", lambda frame=frame: model.predict(frame)),
+        ]
+        if loaded.engine is not None:
+            cases.append((f"engine_predict[{n}]",
+                          lambda columns=columns: loaded.engine.predict_columns(columns)))
+
+    cases.append(("save_prediction_result", lambda: crud.save_prediction_result(user, "Low", loaded.version)))
+
+    seed_results(create_engine(database_url), max(BATCH_SIZES))
+    for n in (10, 100, 1000, 10000):
+        rows = crud.get_result_rows_page(limit=n)
+        cases += [
+            (f"query_page_rows[{n}]", lambda n=n: crud.get_result_rows_page(limit=n)),
+            (f"format_results[{n}]", lambda rows=rows: _format_results(rows)),
+            (f"format_results_json[{n}]", lambda rows=rows: _dumps({"results": _format_results(rows)})),
+        ]
+    return cases
+
+
+def measure(fn, repeat: int, min_time: float) -> dict:
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    per_call = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+
+    fn()  # Let caches and lazy imports settle before measuring memory
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {
+        "median_us": round(statistics.median(per_call) * 1e6, 3),
+        "min_us": round(min(per_call) * 1e6, 3),
+        "calls": number * repeat,
+        "peak_kib": round((peak - before) / 1024, 2),
+        "retained_b": after - before,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    print(f"\n{'stage':<32}{'before us':>12}{'now us':>12}{'change':>9}")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        change = result["median_us"] / old["median_us"] - 1 if old["median_us"] else 0.0
+        print(f"{name:<32}{old['median_us']:>12.2f}{result['median_us']:>12.2f}{change:>+9.1%}")
+        if change > tolerance:
+            regressions.append(f"{name}: {old['median_us']} -> {result['median_us']} us")
+    return regressions
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", help="only run stages whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per stage; the median is reported")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timing run")
+    parser.add_argument("--database-url", help="empty database for the persistence stages "
+                                               "(default: temporary SQLite file)")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--baseline", type=Path, help="compare with the results in this file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown per stage (default 0.2)")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{Path(tmpdir.name) / 'micro.db'}"
+
+    results = {}
+    print(f"{'stage':<32}{'median us':>12}{'peak KiB':>10}{'retained B':>12}")
+    try:
+        for name, fn in _cases(database_url):
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = result = measure(fn, args.repeat, args.min_time)
+            print(f"{name:<32}{result['median_us']:>12.2f}{result['peak_kib']:>10.1f}{result['retained_b']:>12}")
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    report = {
+        "commit": _git_commit(),
+        "started_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Query plans and timings for the /results filter queries, with and without indexes.
+
+Seeds a fresh database, then runs the statements the API issues (built from
+the same crud helpers) twice: once with only the primary key, once with the
+indexes declared on `PredictionResult`. Prints the plan and median latency
+of each query in both phases.
+
+    python -m benchmarks.query_plans --rows 1000000
+    python -m benchmarks.query_plans --database-url postgresql://user:pw@localhost/bench
+
+The default database is a throwaway SQLite file. A PostgreSQL database must
+be empty; the benchmark creates and fills `prediction_results` itself.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from benchmarks.seed import CATEGORIES, CITIES, seed_results
+from insuremate.db.crud import _KEYSET_ORDER, _filtered
+from insuremate.db.models import PredictionResult
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "sqlite")
+def _explain_sqlite(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
+
+
+@compiles(Explain, "postgresql")
+def _explain_postgresql(element, compiler, **kw):
+    return "EXPLAIN (ANALYZE, BUFFERS) " + compiler.process(element.statement, **kw)
+
+
+@compiles(Explain)
+def _explain_default(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+def _queries(conn):
+    """Representative statements, with parameters taken from the seeded data."""
+    table = PredictionResult.__table__
+    busiest = conn.execute(
+        select(table.c.city).group_by(table.c.city).order_by(func.count().desc()).limit(1)
+    ).scalar_one()
+    middle = conn.execute(
+        select(table.c.created_at, table.c.id).order_by(*_KEYSET_ORDER)
+        .offset(conn.execute(select(func.count()).select_from(table)).scalar_one() // 2).limit(1)
+    ).one()
+    cursor = (middle.created_at, middle.id)
+    week = (middle.created_at, middle.created_at + timedelta(days=7))
+    rare = CITIES[-1]
+
+    def page(city=None, category=None, after=None):
+        return _filtered(select(table), city, category, after).order_by(*_KEYSET_ORDER).limit(100)
+
+    return {
+        "city, full listing (rare city)": _filtered(select(table), city=rare),
+        "city, first page (busiest city)": page(city=busiest),
+        "city, page mid-table": page(city=busiest, after=cursor),
+        "category, page mid-table": page(category=CATEGORIES[2], after=cursor),
+        "unfiltered, page mid-table": page(after=cursor),
+        "created_at range, one week": select(func.count()).select_from(table)
+            .where(table.c.created_at.between(*week)),
+        "city + created_at range, one week": select(func.count()).select_from(table)
+            .where(table.c.city == busiest, table.c.created_at.between(*week)),
+    }
+
+
+def _plan(conn, stmt) -> str:
+    rows = conn.execute(Explain(stmt)).all()
+    if conn.dialect.name == "sqlite":
+        return "\n".join(row[-1] for row in rows)
+    return "\n".join(str(row[0]) for row in rows)
+
+
+def _time(conn, stmt, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(stmt).all()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _analyze(conn) -> None:
+    conn.execute(text("ANALYZE"))
+
+
+def _run_phase(engine, repeat: int) -> dict:
+    with engine.connect() as conn:
+        _analyze(conn)
+        return {
+            name: {"plan": _plan(conn, stmt), "median_ms": round(_time(conn, stmt, repeat), 3)}
+            for name, stmt in _queries(conn).items()
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--database-url", help="empty database to use (default: temporary SQLite file)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query; the median is reported")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{Path(tmpdir.name) / 'bench.db'}"
+    engine = create_engine(url)
+    table = PredictionResult.__table__
+
+    with engine.connect() as conn:
+        if engine.dialect.has_table(conn, table.name) and conn.execute(
+            select(func.count()).select_from(table)
+        ).scalar_one():
+            print(f"{table.name} already has rows; point --database-url at an empty database",
+                  file=sys.stderr)
+            return 1
+
+    start = time.perf_counter()
+    seed_results(engine, args.rows)
+    print(f"Seeded {args.rows} rows into {engine.dialect.name} in {time.perf_counter() - start:.1f}s")
+
+    results = {"dialect": engine.dialect.name, "rows": args.rows}
+    with engine.begin() as conn:
+        for index in table.indexes:
+            index.drop(conn)
+    results["without_indexes"] = _run_phase(engine, args.repeat)
+    with engine.begin() as conn:
+        for index in table.indexes:
+            index.create(conn)
+    results["with_indexes"] = _run_phase(engine, args.repeat)
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    for name in results["with_indexes"]:
+        before, after = results["without_indexes"][name], results["with_indexes"][name]
+        print(f"\n== {name}: {before['median_ms']:.2f} ms -> {after['median_ms']:.2f} ms")
+        print("  without indexes: " + before["plan"].replace("\n", "\n                   "))
+        print("  with indexes:    " + after["plan"].replace("\n", "\n                   "))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Fill a database with synthetic prediction results for benchmarking.
+
+Rows look like production traffic: a skewed city distribution (a few big
+cities dominate), a skewed category mix, and `created_at` increasing with
+`id` over the last `days` days.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import insert
+
+from insuremate.db.base import Base
+from insuremate.db.models import PredictionResult
+from insuremate.schemas import TIER_1_CITIES, TIER_2_CITIES, get_age_group, get_city_tier, get_lifestyle_risk
+
+CITIES = TIER_1_CITIES + TIER_2_CITIES + [f"Town-{i}" for i in range(200)]
+CATEGORIES = ["Low", "Medium", "High"]
+CATEGORY_WEIGHTS = [0.5, 0.35, 0.15]
+OCCUPATIONS = ["retired", "freelancer", "student", "government_job",
+               "business_owner", "unemployed", "private_job"]
+
+
+def generate_rows(n: int, seed: int = 0, days: int = 365, end: datetime | None = None):
+    """Yield `n` prediction result rows as column dicts, oldest first."""
+    rng = np.random.default_rng(seed)
+    end = end or datetime.utcnow()
+    start = end - timedelta(days=days)
+    # Zipf-like popularity: city k is picked with weight 1 / (k + 1)
+    weights = 1.0 / np.arange(1, len(CITIES) + 1)
+    cities = rng.choice(len(CITIES), size=n, p=weights / weights.sum())
+    categories = rng.choice(len(CATEGORIES), size=n, p=CATEGORY_WEIGHTS)
+    offsets = np.sort(rng.uniform(0, days * 86400, size=n))
+    ages = rng.integers(18, 80, size=n)
+    weights_kg = rng.uniform(45, 120, size=n).round(1)
+    heights = rng.uniform(1.45, 2.0, size=n).round(2)
+    incomes = rng.uniform(1, 50, size=n).round(2)
+    smokers = rng.random(n) < 0.2
+    occupations = rng.choice(len(OCCUPATIONS), size=n)
+
+    for i in range(n):
+        bmi = float(weights_kg[i] / (heights[i] * heights[i]))
+        age = int(ages[i])
+        city = CITIES[cities[i]]
+        yield {
+            "age": age,
+            "weight": float(weights_kg[i]),
+            "height": float(heights[i]),
+            "income_lpa": float(incomes[i]),
+            "smoker": bool(smokers[i]),
+            "city": city,
+            "occupation": OCCUPATIONS[occupations[i]],
+            "bmi": bmi,
+            "lifestyle_risk": get_lifestyle_risk(bool(smokers[i]), bmi),
+            "age_group": get_age_group(age),
+            "city_tier": get_city_tier(city),
+            "predicted_category": CATEGORIES[categories[i]],
+            "created_at": start + timedelta(seconds=float(offsets[i])),
+        }
+
+
+def seed_results(engine, n: int, seed: int = 0, days: int = 365, chunk_size: int = 20000) -> int:
+    """Create the schema on `engine` and insert `n` synthetic rows. Returns rows inserted."""
+    Base.metadata.create_all(bind=engine)
+    stmt = insert(PredictionResult)
+    inserted = 0
+    chunk = []
+    with engine.begin() as conn:
+        for row in generate_rows(n, seed=seed, days=days):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                conn.execute(stmt, chunk)
+                inserted += len(chunk)
+                chunk = []
+        if chunk:
+            conn.execute(stmt, chunk)
+            inserted += len(chunk)
+    return inserted
@@ -0,0 +1,43 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from starlette.concurrency import run_in_threadpool
+
+from insuremate.core.config import ADMIN_TOKEN
+from insuremate.services import predict as predict_service
+from insuremate.services.model_registry import ModelRejected
+
+
+def _require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled; set ADMIN_TOKEN to enable them")
+    if not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(_require_admin)])
+
+
+@router.get("/model")
+async def model_status():
+    return predict_service.REGISTRY.status()
+
+
+@router.post("/model/reload", status_code=202)
+async def reload_model(response: Response, force: bool = False, wait: bool = False):
+    """Load MODEL_PATH in the background, validate it and swap it in.
+
+    With `wait=true` the response is sent once the reload has finished:
+    200 with the active model, or 422 if the candidate was rejected.
+    """
+    registry = predict_service.REGISTRY
+    if not wait:
+        started = registry.reload_in_background(force)
+        return {"status": "reloading" if started else "already reloading", **registry.status()}
+    try:
+        loaded = await run_in_threadpool(registry.reload, force)
+    except ModelRejected as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    response.status_code = 200
+    return {"status": "active", "active": loaded.describe()}
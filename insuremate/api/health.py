@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from insuremate.db import session as db_session
@@ -30,3 +30,11 @@ async def health_check():
                 "timestamp": datetime.datetime.now().isoformat()
             }
         )
+
+
+@router.get("/ready", tags=["health"])
+async def readiness_check(request: Request):
+    # Ready only once the lifespan startup has loaded and warmed up the model
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=503, detail={"status": "starting"})
+    return {"status": "ready"}
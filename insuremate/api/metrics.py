@@ -0,0 +1,63 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from insuremate.core.metrics import Counter, Histogram, render_latest
+
+router = APIRouter()
+
+HTTP_REQUESTS = Counter(
+    "insuremate_http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]
+)
+HTTP_EXCEPTIONS = Counter(
+    "insuremate_http_exceptions_total", "Requests that raised an unhandled exception", ["method", "route"]
+)
+HTTP_DURATION = Histogram(
+    "insuremate_http_request_duration_seconds", "Time to send the full response", ["method", "route"]
+)
+
+
+class MetricsMiddleware:
+    """Count and time every HTTP request, labelled by route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware: no extra task or response
+    copying per request, and streamed bodies are timed to their last byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        try:
+            await self.app(scope, receive, send_status)
+        except Exception:
+            HTTP_EXCEPTIONS.inc(method=method, route=_route(scope))
+            raise
+        finally:
+            route = _route(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status)
+            HTTP_DURATION.observe(time.perf_counter() - start, method=method, route=route)
+
+
+def _route(scope) -> str:
+    # The template ("/results/city/{city}"), never the raw path, bounds label cardinality
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, tags=["health"])
+def metrics():
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4")
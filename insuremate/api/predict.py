@@ -1,17 +1,77 @@
-from fastapi import APIRouter
+from typing import Any, Optional
+
+from fastapi import APIRouter, Body, Header, HTTPException, Response
+from insuremate.core.config import (
+    BATCH_MAX_RECORDS,
+    IDEMPOTENCY_DB,
+    IDEMPOTENCY_MAX_KEYS,
+    IDEMPOTENCY_TTL,
+    IDEMPOTENCY_WAIT_TIMEOUT,
+)
 from insuremate.schemas import Userinput
-from insuremate.services.predict import predict_from_user
+from insuremate.services.batching import BatcherFull, BatcherTimeout
+from insuremate.db.writer import WriteBehindFull
+from insuremate.services.idempotency import (
+    IdempotencyInProgress,
+    IdempotencyKeyReused,
+    IdempotencyStore,
+    fingerprint,
+)
+from insuremate.services.predict import predict_batch_async, predict_from_user_async
 
 router = APIRouter()
 
+IDEMPOTENCY = IdempotencyStore(IDEMPOTENCY_TTL, IDEMPOTENCY_MAX_KEYS, shared=IDEMPOTENCY_DB,
+                               wait_timeout=IDEMPOTENCY_WAIT_TIMEOUT)
+
 
 @router.post("/predict")
-def predict(data: Userinput):
-    prediction, db_record, explain_text, warnings = predict_from_user(data)
+async def predict(data: Userinput, response: Response,
+                  idempotency_key: Optional[str] = Header(None, max_length=255)):
+    if idempotency_key is None:
+        return await _predict(data)
+    try:
+        body, replayed = await IDEMPOTENCY.run(idempotency_key, fingerprint(data.model_dump_json()),
+                                               lambda: _predict(data))
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
+
+
+async def _predict(data: Userinput) -> dict[str, Any]:
+    try:
+        prediction, db_record, explain_text, warnings = await predict_from_user_async(data)
+    except (BatcherFull, BatcherTimeout, WriteBehindFull) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     return {
         "predicted_category": prediction,
         "result_id": db_record.id,
+        "model_version": db_record.model_version,
         "explain_text": explain_text,
         "warnings": warnings,
         "message": "Prediction saved successfully"
     }
+
+
+@router.post("/predict/batch")
+async def predict_batch_route(records: list[dict[str, Any]] = Body(...)):
+    if len(records) > BATCH_MAX_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(records)} records exceeds the limit of {BATCH_MAX_RECORDS}",
+        )
+    try:
+        outcomes = await predict_batch_async(records)
+    except WriteBehindFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    failed = sum(1 for o in outcomes if "error" in o)
+    return {
+        "total": len(outcomes),
+        "succeeded": len(outcomes) - failed,
+        "failed": failed,
+        "results": outcomes,
+    }
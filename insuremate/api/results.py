@@ -1,33 +1,185 @@
-from fastapi import APIRouter
-from insuremate.db.crud import get_all_results, get_results_by_city, get_results_by_category
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from insuremate.core.config import (
+    RESULTS_CACHE_MAX_BODY_BYTES,
+    RESULTS_CACHE_SIZE,
+    RESULTS_MAX_PAGE_SIZE,
+    RESULTS_STREAM_CHUNK_SIZE,
+    RESULTS_VERSION_TTL,
+)
+from insuremate.db import async_crud
+from insuremate.db.crud import RESULT_COLUMNS, iter_results
+from insuremate.schemas import ResultsByCategoryResponse, ResultsByCityResponse, ResultsResponse
+from insuremate.services.export import FORMATS, ExportUnavailable, export_results
 from insuremate.services.predict import get_recent_predictions
+from insuremate.services.response_cache import ResponseCache, ResultsVersion, etag_matches
+
+try:
+    import orjson
+except ImportError:  # optional: faster encoding of result listings
+    orjson = None
 
 router = APIRouter()
 
+_RESPONSES = ResponseCache("results", RESULTS_CACHE_SIZE, RESULTS_CACHE_MAX_BODY_BYTES)
+_VERSION = ResultsVersion(async_crud.get_results_version, RESULTS_VERSION_TTL)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(content) -> bytes:
+    """JSON-encode `content`; datetimes become ISO 8601 strings."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), default=_json_default).encode()
+
+
+def _format_results(rows):
+    """Result tuples (in RESULT_COLUMNS order) -> dicts ready for `_dumps`."""
+    return [dict(zip(RESULT_COLUMNS, row)) for row in rows]
+
+
+def _conditional_response(request: Request, cached) -> Response:
+    """200 with the cached body, or 304 if the client already has it."""
+    # Clients may reuse a copy but must revalidate it each time
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+def _ndjson(rows):
+    for row in rows:
+        yield _dumps(row) + b"\n"
+
+
+def _encode_cursor(result):
+    raw = f"{result.created_at.isoformat()}|{result.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    """`next_cursor` -> (created_at, id) of the last row already returned."""
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, _, result_id = raw.rpartition("|")
+        return datetime.fromisoformat(created_at), int(result_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _list_results(request, limit, after, fmt, city=None, category=None):
+    """Shared handler: full listing, a keyset page, or an NDJSON stream."""
+    cursor = _decode_cursor(after)
+    if fmt == "ndjson":
+        rows = iter_results(after=cursor, city=city, category=category,
+                            chunk_size=RESULTS_STREAM_CHUNK_SIZE)
+        return StreamingResponse(_ndjson(rows), media_type="application/x-ndjson")
+
+    key = (city, category, limit, after)
+    version = await _VERSION.get()
+    cached = _RESPONSES.get(key, version)
+    if cached is None:
+        content = await _fetch_listing(limit, cursor, city, category)
+        # Encoded here rather than by FastAPI, which would validate and re-encode
+        # every row through jsonable_encoder; off the event loop, since an
+        # unpaged listing can be megabytes to encode and hash
+        cached = await run_in_threadpool(_encode_and_cache, key, version, content)
+    return _conditional_response(request, cached)
+
+
+def _encode_and_cache(key, version, content):
+    return _RESPONSES.put(key, version, _dumps(content))
+
+
+async def _fetch_listing(limit, cursor, city=None, category=None):
+    # Filtered routes echo their filter value, e.g. {"city": "Pune", ...}
+    extra = {key: value for key, value in (("city", city), ("category", category)) if value is not None}
+    if limit is None and cursor is None:
+        res = await async_crud.get_result_rows(city=city, category=category)
+        return {**extra, "total_results": len(res), "results": _format_results(res)}
+    limit = limit or RESULTS_MAX_PAGE_SIZE
+    res = await async_crud.get_result_rows_page(limit=limit, after=cursor, city=city, category=category)
+    return {
+        **extra,
+        "total_results": len(res),
+        "results": _format_results(res),
+        "next_cursor": _encode_cursor(res[-1]) if len(res) == limit else None,
+    }
+
+
+_LIMIT = Query(None, ge=1, le=RESULTS_MAX_PAGE_SIZE, description="Page size; enables keyset pagination")
+_AFTER = Query(None, description="Resume after this cursor (the next_cursor of the previous page)")
+_FORMAT = Query("json", alias="format", pattern="^(json|ndjson)$",
+                description="'ndjson' streams every matching row, one JSON object per line")
+
+
+@router.get("/results", response_model=ResultsResponse)
+async def results(request: Request, limit: Optional[int] = _LIMIT, after: Optional[str] = _AFTER,
+                  fmt: str = _FORMAT):
+    return await _list_results(request, limit, after, fmt)
+
 
-def _format_results(results):
-    return [{**r.__dict__, "created_at": r.created_at.isoformat()} for r in results]
+@router.get("/results/city/{city}", response_model=ResultsByCityResponse)
+async def results_city(request: Request, city: str, limit: Optional[int] = _LIMIT,
+                       after: Optional[str] = _AFTER, fmt: str = _FORMAT):
+    return await _list_results(request, limit, after, fmt, city=city)
 
 
-@router.get("/results")
-def results():
-    res = get_all_results()
-    return {"total_results": len(res), "results": _format_results(res)}
+@router.get("/results/category/{category}", response_model=ResultsByCategoryResponse)
+async def results_category(request: Request, category: str, limit: Optional[int] = _LIMIT,
+                           after: Optional[str] = _AFTER, fmt: str = _FORMAT):
+    return await _list_results(request, limit, after, fmt, category=category)
 
 
-@router.get("/results/city/{city}")
-def results_city(city: str):
-    res = get_results_by_city(city)
-    return {"city": city, "total_results": len(res), "results": _format_results(res)}
+@router.get("/results/export")
+def results_export(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|parquet|arrow)$",
+                     description="'csv' (gzip), 'parquet' or 'arrow' (IPC stream)"),
+    city: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Only rows created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only rows created before this time"),
+):
+    try:
+        stream = export_results(fmt, city=city, category=category, since=since, until=until)
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    media_type, extension = FORMATS[fmt]
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="prediction_results{extension}"'},
+    )
 
 
-@router.get("/results/category/{category}")
-def results_category(category: str):
-    res = get_results_by_category(category)
-    return {"category": category, "total_results": len(res), "results": _format_results(res)}
+@router.get("/results/stats")
+async def results_stats(
+    since: Optional[date] = Query(None, description="First day included (UTC)"),
+    until: Optional[date] = Query(None, description="First day excluded (UTC)"),
+    group_by: list[Literal["day", "category", "city_tier"]] = Query(
+        ["day", "category", "city_tier"], description="Dimensions of the breakdown"
+    ),
+):
+    # Served from the result_rollups table; cost does not grow with the number of predictions
+    return await async_crud.get_rollup_stats(since=since, until=until,
+                                             group_by=tuple(dict.fromkeys(group_by)))
 
 
 @router.get("/results/recent")
-def results_recent():
+async def results_recent():
     res = get_recent_predictions()
     return {"total_results": len(res), "results": res}
@@ -13,10 +13,132 @@ DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'insurance
 # Model path: can be set via env var. Defaults to model.pkl in project root.
 MODEL_PATH = Path(os.environ.get("MODEL_PATH", str(BASE_DIR / "data" / "model.pkl"))).resolve()
 
+# City -> tier table: a CSV with `city` and `tier` columns; unlisted cities are tier 3
+CITY_TIERS_PATH = Path(os.environ.get("CITY_TIERS_PATH", str(BASE_DIR / "data" / "city_tiers.csv"))).resolve()
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 # App settings
 HOST = os.environ.get("HOST", "0.0.0.0")
 PORT = int(os.environ.get("PORT", 8000))
 
+# Upper bound on records accepted by POST /predict/batch
+BATCH_MAX_RECORDS = int(os.environ.get("BATCH_MAX_RECORDS", 1000))
+
+# Micro-batching of concurrent /predict calls (opt-in)
+PREDICT_BATCHING = _env_bool("PREDICT_BATCHING", False)
+PREDICT_BATCH_WINDOW_MS = float(os.environ.get("PREDICT_BATCH_WINDOW_MS", 2))
+PREDICT_BATCH_MAX_SIZE = int(os.environ.get("PREDICT_BATCH_MAX_SIZE", 64))
+PREDICT_BATCH_MAX_QUEUE = int(os.environ.get("PREDICT_BATCH_MAX_QUEUE", 1024))
+# Seconds a request waits for its batched prediction before answering 503
+PREDICT_BATCH_TIMEOUT = float(os.environ.get("PREDICT_BATCH_TIMEOUT", 30))
+
+# Inference path: "fast" encodes features straight into NumPy, "compiled" also
+# replaces the tree ensemble with flat arrays and "lookup" precomputes every
+# prediction into a table. Each falls back automatically
+# ("lookup" -> "fast", "compiled" -> "fast" -> "pandas") if unsupported or not exact.
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "fast").strip().lower()
+
+# Compiled model artifact; defaults to <model>.compiled.npz next to MODEL_PATH
+COMPILED_MODEL_PATH = os.environ.get("COMPILED_MODEL_PATH") or None
+# Batches larger than this go to the original estimator, which is faster there
+COMPILED_MAX_ROWS = int(os.environ.get("COMPILED_MAX_ROWS", 512))
+# Upper bound on lookup-table cells (one byte each plus per-combination thresholds)
+LOOKUP_MAX_CELLS = int(os.environ.get("LOOKUP_MAX_CELLS", 5_000_000))
+
+# Score in this many worker processes (each loads its own copy of the model);
+# 0 scores in the serving process
+INFERENCE_PROCESSES = int(os.environ.get("INFERENCE_PROCESSES", 0))
+
+# Model hot reload: poll MODEL_PATH this often in seconds (0 disables the watcher;
+# POST /admin/model/reload always works). Candidates are validated on the
+# holdout CSV (Userinput fields plus an optional `label` column), or on
+# synthetic applicants if unset, and rejected if they do worse than the
+# active model by more than these margins.
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", 0))
+MODEL_HOLDOUT_PATH = os.environ.get("MODEL_HOLDOUT_PATH") or None
+MODEL_HOLDOUT_ROWS = int(os.environ.get("MODEL_HOLDOUT_ROWS", 1000))
+MODEL_MAX_ACCURACY_DROP = float(os.environ.get("MODEL_MAX_ACCURACY_DROP", 0.02))
+MODEL_MAX_ERROR_RATE_INCREASE = float(os.environ.get("MODEL_MAX_ERROR_RATE_INCREASE", 0.01))
+# Required in the X-Admin-Token header of /admin routes; unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# With several server workers, each writes its metrics here so /metrics can
+# report totals for all of them (unset: single-process metrics)
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 1.0))
+
+# Depth of the /results/recent log; with RECENT_PREDICTIONS_PATH set it is a
+# memory-mapped file shared by every worker on the host (unset: per process),
+# stored at <path>.<depth>x<slot size>
+RECENT_PREDICTIONS_DEPTH = int(os.environ.get("RECENT_PREDICTIONS_DEPTH", 3))
+RECENT_PREDICTIONS_PATH = os.environ.get("RECENT_PREDICTIONS_PATH") or None
+
+# Synthetic predictions scored at startup before /ready reports ready (0 skips warmup)
+WARMUP_PREDICTIONS = int(os.environ.get("WARMUP_PREDICTIONS", 256))
+
+# Prediction cache keyed on the six model features (size 0 disables it)
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+PREDICTION_CACHE_POLICY = os.environ.get("PREDICTION_CACHE_POLICY", "lru").strip().lower()
+
+# /predict requests with an Idempotency-Key header are answered once and
+# replayed for IDEMPOTENCY_TTL seconds. IDEMPOTENCY_DB also records them in
+# the idempotency_keys table so every worker replays the same result; a
+# duplicate waits up to IDEMPOTENCY_WAIT_TIMEOUT seconds for the first call
+IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", 86400))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get("IDEMPOTENCY_MAX_KEYS", 10000))
+IDEMPOTENCY_DB = _env_bool("IDEMPOTENCY_DB", False)
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.environ.get("IDEMPOTENCY_WAIT_TIMEOUT", 30))
+
+# Write-behind persistence: queue results in memory and bulk-insert them from
+# a background thread instead of committing on the request path
+WRITE_BEHIND = _env_bool("WRITE_BEHIND", False)
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", 500))
+WRITE_BEHIND_FLUSH_MS = float(os.environ.get("WRITE_BEHIND_FLUSH_MS", 500))
+WRITE_BEHIND_MAX_PENDING = int(os.environ.get("WRITE_BEHIND_MAX_PENDING", 10000))
+WRITE_BEHIND_PUT_TIMEOUT = float(os.environ.get("WRITE_BEHIND_PUT_TIMEOUT", 2))
+WRITE_BEHIND_ID_BLOCK = int(os.environ.get("WRITE_BEHIND_ID_BLOCK", 100))
+
+# /results pagination and streaming
+RESULTS_MAX_PAGE_SIZE = int(os.environ.get("RESULTS_MAX_PAGE_SIZE", 1000))
+RESULTS_STREAM_CHUNK_SIZE = int(os.environ.get("RESULTS_STREAM_CHUNK_SIZE", 1000))
+# Identical reads running at the same time share one database query
+DB_READ_COALESCING = _env_bool("DB_READ_COALESCING", True)
+
+# Encoded /results responses kept per worker (0 disables; ETags are still sent).
+# They are invalidated by this worker's writes at once and by other workers'
+# writes once the database version is checked again, every
+# RESULTS_VERSION_TTL seconds (0 checks on every request)
+RESULTS_CACHE_SIZE = int(os.environ.get("RESULTS_CACHE_SIZE", 256))
+RESULTS_CACHE_MAX_BODY_BYTES = int(os.environ.get("RESULTS_CACHE_MAX_BODY_BYTES", 1 << 20))
+RESULTS_VERSION_TTL = float(os.environ.get("RESULTS_VERSION_TTL", 1.0))
+# Rows per chunk (and Parquet row group / Arrow record batch) in /results/export
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 50000))
+
+# Async database access through SQLAlchemy's asyncio extension (needs
+# aiosqlite or asyncpg); the async URL is derived from DATABASE_URL unless set
+ASYNC_DB = _env_bool("ASYNC_DB", False)
+ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL") or None
+
+# Connection pool (QueuePool; ignored for in-memory SQLite). A recycle of -1
+# keeps connections forever; pre-ping tests each connection on checkout.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+
+# SQLite connection settings, applied on every new connection. WAL lets
+# readers proceed while a writer commits.
+SQLITE_WAL = _env_bool("SQLITE_WAL", True)
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL").strip().upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
 # For SQLAlchemy connect args for SQLite
 def get_sqlalchemy_connect_args():
     if DATABASE_URL.startswith("sqlite"):
@@ -0,0 +1,368 @@
+"""Lightweight in-process metrics with Prometheus text exposition.
+
+Metrics register themselves on creation and are rendered by `render_latest()`
+(served at `/metrics`). Values are kept per label combination.
+
+With several server worker processes, `start_multiprocess(directory)` makes
+each process write a snapshot of its metrics to `directory` every few
+seconds; `render_latest()` then merges the snapshots of every process, so
+any worker answering a scrape reports totals for all of them. Counters and
+histograms are summed; gauges get a `pid` label.
+"""
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 registry: "Registry | None" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _add(self, amount: float, labels: dict) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> dict[tuple, Any]:
+        """Current value per label combination, as merged across processes."""
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self, values: dict[tuple, Any] | None = None) -> list[tuple[str, tuple, tuple, float]]:
+        """(name, labelnames, label values, value) lines for `values` (default: this process)."""
+        values = self.snapshot() if values is None else values
+        return [(self.name, self.labelnames, key, value) for key, value in values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._add(amount, labels)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 registry: "Registry | None" = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self._functions: dict[tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        self._add(amount, labels)
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self._add(-amount, labels)
+
+    def set_function(self, fn: Callable[[], float], **labels) -> None:
+        """Compute the value for these labels lazily at scrape time."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def get(self, **labels) -> float:
+        fn = self._functions.get(self._key(labels))
+        if fn is not None:
+            return float(fn())
+        return super().get(**labels)
+
+    def snapshot(self) -> dict[tuple, Any]:
+        with self._lock:
+            functions = list(self._functions.items())
+            values = dict(self._values)
+        values.update((key, float(fn())) for key, fn in functions)
+        return values
+
+
+# Upper bounds in seconds; covers cache hits (sub-millisecond) to slow exports
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets, plus their sum and count.
+
+    `observe` does one binary search and two additions under a lock, so it is
+    cheap enough for every request.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS, registry: "Registry | None" = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: [per-bucket counts (last is +Inf), sum]
+        self._series: dict[tuple, list] = {}
+
+    def labels(self, **labels) -> "BoundHistogram":
+        """Resolve the labels once for a hot path."""
+        return BoundHistogram(self, self._key(labels))
+
+    def observe(self, value: float, **labels) -> None:
+        self._observe(self._key(labels), value)
+
+    def _observe(self, key: tuple, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager / decorator observing elapsed seconds."""
+        return _Timer(self, self._key(labels))
+
+    def get(self, **labels) -> float:
+        """Number of observations."""
+        series = self._series.get(self._key(labels))
+        return float(sum(series[0])) if series else 0.0
+
+    def get_sum(self, **labels) -> float:
+        series = self._series.get(self._key(labels))
+        return series[1] if series else 0.0
+
+    def snapshot(self) -> dict[tuple, Any]:
+        with self._lock:
+            return {key: [list(counts), total] for key, (counts, total) in self._series.items()}
+
+    def samples(self, values: dict[tuple, Any] | None = None) -> list[tuple[str, tuple, tuple, float]]:
+        values = self.snapshot() if values is None else values
+        bucket_labels = self.labelnames + ("le",)
+        bounds = [repr(float(b)) for b in self.buckets] + ["+Inf"]
+        lines = []
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append((f"{self.name}_bucket", bucket_labels, key + (bound,), float(cumulative)))
+            lines.append((f"{self.name}_sum", self.labelnames, key, float(total)))
+            lines.append((f"{self.name}_count", self.labelnames, key, float(cumulative)))
+        return lines
+
+
+class BoundHistogram:
+    """A histogram with its labels already resolved."""
+
+    __slots__ = ("_histogram", "_key")
+
+    def __init__(self, histogram: Histogram, key: tuple):
+        self._histogram = histogram
+        self._key = key
+
+    def observe(self, value: float) -> None:
+        self._histogram._observe(self._key, value)
+
+    def time(self) -> "_Timer":
+        return _Timer(self._histogram, self._key)
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_key", "_start")
+
+    def __init__(self, histogram: Histogram, key: tuple):
+        self._histogram = histogram
+        self._key = key
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram._observe(self._key, time.perf_counter() - self._start)
+
+    def __call__(self, fn):
+        histogram, key = self._histogram, self._key
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def timed_async(*args, **kwargs):
+                with _Timer(histogram, key):
+                    return await fn(*args, **kwargs)
+            return timed_async
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            with _Timer(histogram, key):
+                return fn(*args, **kwargs)
+        return timed
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def metrics(self) -> list[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+
+REGISTRY = Registry()
+
+
+class _Multiprocess:
+    """Writes this process's snapshot to `<directory>/<pid>.json` periodically."""
+
+    def __init__(self, directory: Path, interval: float, registry: Registry):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.registry = registry
+        self.path = self.directory / f"{os.getpid()}.json"
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+
+    def write(self) -> dict:
+        snapshot = {
+            metric.name: [[list(key), value] for key, value in metric.snapshot().items()]
+            for metric in self.registry.metrics()
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot))
+        os.replace(tmp, self.path)
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                pass
+
+    def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.write()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+    def collect(self) -> list[tuple[str, dict, bool]]:
+        """(pid, snapshot, recently written) for every process, this one first."""
+        own = self.write()
+        # Gauges of processes that stopped writing describe nothing current
+        stale_before = time.time() - 3 * self.interval
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            if path == self.path:
+                continue
+            try:
+                fresh = path.stat().st_mtime >= stale_before
+                snapshots.append((path.stem, json.loads(path.read_text()), fresh))
+            except (OSError, ValueError):
+                continue
+        return [(str(os.getpid()), own, True)] + snapshots
+
+
+_MULTIPROCESS: _Multiprocess | None = None
+
+
+def start_multiprocess(directory: str | Path, interval: float = 1.0, registry: Registry = REGISTRY) -> None:
+    """Share metrics with the other worker processes through `directory`.
+
+    Every worker must use the same directory; clear it when the whole service
+    is redeployed so counters restart from zero.
+    """
+    global _MULTIPROCESS
+    if _MULTIPROCESS is None:
+        _MULTIPROCESS = _Multiprocess(directory, interval, registry)
+        _MULTIPROCESS.start()
+
+
+def stop_multiprocess() -> None:
+    """Write a final snapshot; counters of exited workers stay in the totals."""
+    global _MULTIPROCESS
+    if _MULTIPROCESS is not None:
+        _MULTIPROCESS.stop()
+        _MULTIPROCESS = None
+
+
+def _merged_samples(metric: _Metric, snapshots) -> list[tuple[str, tuple, tuple, float]]:
+    if isinstance(metric, Gauge):
+        values = {
+            tuple(key) + (pid,): value
+            for pid, snapshot, fresh in snapshots if fresh
+            for key, value in snapshot.get(metric.name, [])
+        }
+        return [(name, labelnames + ("pid",), key, value)
+                for name, labelnames, key, value in metric.samples(values)]
+    merged: dict[tuple, Any] = {}
+    for _, snapshot, _ in snapshots:
+        for key, value in snapshot.get(metric.name, []):
+            key = tuple(key)
+            if isinstance(metric, Histogram):
+                if key in merged:
+                    counts, total = merged[key]
+                    merged[key] = [[a + b for a, b in zip(counts, value[0])], total + value[1]]
+                else:
+                    merged[key] = value
+            else:
+                merged[key] = merged.get(key, 0.0) + value
+    return metric.samples(merged)
+
+
+def _format_labels(labelnames: tuple, key: tuple) -> str:
+    if not key:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_latest(registry: Registry = REGISTRY) -> str:
+    """Render every registered metric in Prometheus text format (v0.0.4).
+
+    In multiprocess mode the values are those of all worker processes.
+    """
+    snapshots = _MULTIPROCESS.collect() if _MULTIPROCESS is not None and registry is _MULTIPROCESS.registry else None
+    lines: list[str] = []
+    for metric in registry.metrics():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        samples = metric.samples() if snapshots is None else _merged_samples(metric, snapshots)
+        for name, labelnames, key, value in samples:
+            lines.append(f"{name}{_format_labels(labelnames, key)} {value!r}")
+    return "\n".join(lines) + "\n"
@@ -5,6 +5,7 @@ from .base import Base
 from .models import PredictionResult
 from .crud import (
     save_prediction_result,
+    save_prediction_results,
     get_all_results,
     get_results_by_city,
     get_results_by_category,
@@ -17,6 +18,7 @@ __all__ = [
     "Base",
     "PredictionResult",
     "save_prediction_result",
+    "save_prediction_results",
     "get_db",
     "get_all_results",
     "get_results_by_city",
@@ -0,0 +1,98 @@
+"""Awaitable versions of the CRUD helpers for `async def` routes.
+
+With `ASYNC_DB` enabled, each call runs the shared session-level helper from
+`crud` on an `AsyncSession` via `run_sync`, so waiting on the database does
+not hold a thread. Otherwise (and for write-behind saves, which never wait on
+the database) the blocking function runs in Starlette's threadpool, which is
+exactly what a plain `def` route would have done.
+
+Identical reads that overlap share one database call (see `SingleFlight`);
+DB_READ_COALESCING=false turns that off.
+"""
+
+from starlette.concurrency import run_in_threadpool
+
+from insuremate.core.config import DB_READ_COALESCING, WRITE_BEHIND
+from insuremate.db import crud
+from insuremate.db import session as db_session
+from insuremate.services.singleflight import SingleFlight
+
+
+async def _run(fallback, helper, *args):
+    if db_session.AsyncSessionLocal is None:
+        return await run_in_threadpool(fallback, *args)
+    async with db_session.AsyncSessionLocal() as db:
+        return await db.run_sync(helper, *args)
+
+
+# One group per read helper, so coalescing is reported per operation
+_FLIGHTS: dict[str, SingleFlight] = {}
+
+
+async def _read(fallback, helper, *args):
+    """`_run` for reads: joins an identical read already in flight.
+
+    The result may be shared with other callers and must not be mutated.
+    """
+    operation = helper.__name__.lstrip("_")
+    flight = _FLIGHTS.get(operation)
+    if flight is None:
+        flight = _FLIGHTS.setdefault(operation, SingleFlight(operation, enabled=DB_READ_COALESCING))
+    return await flight.do(args, lambda: _run(fallback, helper, *args))
+
+
+async def save_prediction_result(user_input, predicted_category, model_version=None):
+    if WRITE_BEHIND or db_session.AsyncSessionLocal is None:
+        return await run_in_threadpool(crud.save_prediction_result, user_input, predicted_category,
+                                       model_version)
+    row = crud._result_row(user_input, predicted_category, model_version)
+    async with db_session.AsyncSessionLocal() as db:
+        return await db.run_sync(crud._insert_result, row)
+
+
+async def save_prediction_results(rows):
+    """Bulk insert prediction rows; returns the new ids in input order."""
+    if not rows:
+        return []
+    if WRITE_BEHIND or db_session.AsyncSessionLocal is None:
+        return await run_in_threadpool(crud.save_prediction_results, rows)
+    crud._stamp_rows(rows)
+    async with db_session.AsyncSessionLocal() as db:
+        return await db.run_sync(crud._insert_results, rows)
+
+
+async def get_all_results():
+    return await _read(crud.get_all_results, crud._query_all)
+
+
+async def get_results_by_city(city: str):
+    return await _read(crud.get_results_by_city, crud._query_by_city, city)
+
+
+async def get_results_by_category(category: str):
+    return await _read(crud.get_results_by_category, crud._query_by_category, category)
+
+
+async def get_results_page(limit: int, after=None, city: str | None = None, category: str | None = None):
+    return await _read(crud.get_results_page, crud._query_page, limit, after, city, category)
+
+
+async def get_result_rows(city: str | None = None, category: str | None = None):
+    return await _read(crud.get_result_rows, crud._query_rows, city, category)
+
+
+async def get_result_rows_page(limit: int, after=None, city: str | None = None, category: str | None = None):
+    return await _read(crud.get_result_rows_page, crud._query_page_rows, limit, after, city, category)
+
+
+async def get_rollup_stats(since=None, until=None, group_by=("day", "category", "city_tier")):
+    return await _read(crud.get_rollup_stats, crud._query_rollup_stats, since, until, group_by)
+
+
+async def get_results_version():
+    return await _read(crud.get_results_version, crud._query_version)
+
+
+async def get_statistics():
+    stats = await get_rollup_stats(group_by=())
+    return {key: value for key, value in stats.items() if key != "breakdown"}
@@ -0,0 +1,24 @@
+"""Change tracking for `prediction_results`, used to invalidate cached reads.
+
+Every code path that commits new results calls `mark_results_written()`
+afterwards, so this process notices its own writes immediately. Writes by
+other processes show up in `crud.get_results_version()`, which reads the
+highest id and the rollup row total (both maintained by every insert).
+"""
+
+import threading
+
+_writes = 0
+_lock = threading.Lock()
+
+
+def mark_results_written() -> None:
+    """Record that this process committed new prediction results."""
+    global _writes
+    with _lock:
+        _writes += 1
+
+
+def local_writes() -> int:
+    """Number of result commits made by this process so far."""
+    return _writes
@@ -1,70 +1,303 @@
-from sqlalchemy import func
+from datetime import date, datetime
+from sqlalchemy import func, insert, select, tuple_
+from insuremate.core.config import WRITE_BEHIND
+from insuremate.core.metrics import Counter, Histogram
+from insuremate.db.changes import mark_results_written
 from insuremate.db.session import SessionLocal
-from insuremate.db.models import PredictionResult
-
-def save_prediction_result(user_input, predicted_category):
-    db = SessionLocal()
-    try:
-        result = PredictionResult(
-            age=user_input.age,
-            weight=user_input.weight,
-            height=user_input.height,
-            income_lpa=user_input.income_lpa,
-            smoker=user_input.smoker,
-            city=user_input.city,
-            occupation=user_input.occupation,
-            bmi=user_input.bmi,
-            lifestyle_risk=user_input.lifestyle_risk,
-            age_group=user_input.age_group,
-            city_tier=user_input.city_tier,
-            predicted_category=predicted_category
-        )
-        db.add(result)
-        db.commit()
-        db.refresh(result)
-        return result
-    finally:
-        db.close()
+from insuremate.db.models import PredictionResult, ResultRollup
+from insuremate.db.rollups import apply_rollups
+from insuremate.db.writer import get_writer
+
+DB_SECONDS = Histogram(
+    "insuremate_db_operation_seconds", "Time spent in each CRUD operation, commit included", ["operation"]
+)
+DB_ROWS = Counter(
+    "insuremate_db_rows_read_total", "Result rows read from the database, by operation", ["operation"]
+)
+
+
+def _queue_rows(rows):
+    """Assign ids and timestamps to rows and hand them to the write-behind writer."""
+    writer = get_writer()
+    for row in rows:
+        row["id"] = writer.allocator.next_id()
+        row.setdefault("created_at", datetime.utcnow())
+        writer.submit(row)
+    return [row["id"] for row in rows]
+
+
+def _result_row(user_input, predicted_category, model_version=None):
+    return dict(
+        age=user_input.age,
+        weight=user_input.weight,
+        height=user_input.height,
+        income_lpa=user_input.income_lpa,
+        smoker=user_input.smoker,
+        city=user_input.city,
+        occupation=user_input.occupation,
+        bmi=user_input.bmi,
+        lifestyle_risk=user_input.lifestyle_risk,
+        age_group=user_input.age_group,
+        city_tier=user_input.city_tier,
+        predicted_category=predicted_category,
+        model_version=model_version,
+        created_at=datetime.utcnow(),
+    )
+
+
+def _stamp_rows(rows):
+    now = datetime.utcnow()
+    for row in rows:
+        row.setdefault("created_at", now)
+    return rows
+
+
+# The _insert_* / _query_* helpers take an open session so that the blocking
+# functions below and their async counterparts (async_crud, via
+# AsyncSession.run_sync) share one implementation; timing them covers both.
+
+@DB_SECONDS.time(operation="insert_result")
+def _insert_result(db, row):
+    result = PredictionResult(**row)
+    db.add(result)
+    apply_rollups(db, [row])
+    db.commit()
+    mark_results_written()
+    db.refresh(result)
+    return result
+
+
+@DB_SECONDS.time(operation="insert_results")
+def _insert_results(db, rows):
+    ids = db.scalars(
+        insert(PredictionResult).returning(PredictionResult.id, sort_by_parameter_order=True),
+        rows,
+    ).all()
+    apply_rollups(db, rows)
+    db.commit()
+    mark_results_written()
+    return list(ids)
+
+
+def _counted(operation, rows):
+    DB_ROWS.inc(len(rows), operation=operation)
+    return rows
+
+
+@DB_SECONDS.time(operation="query_all")
+def _query_all(db):
+    return _counted("query_all", db.query(PredictionResult).all())
+
+
+@DB_SECONDS.time(operation="query_by_city")
+def _query_by_city(db, city):
+    return _counted("query_by_city", db.query(PredictionResult).filter(PredictionResult.city == city).all())
+
+
+@DB_SECONDS.time(operation="query_by_category")
+def _query_by_category(db, category):
+    return _counted("query_by_category",
+                    db.query(PredictionResult).filter(PredictionResult.predicted_category == category).all())
+
+
+def save_prediction_result(user_input, predicted_category, model_version=None):
+    row = _result_row(user_input, predicted_category, model_version)
+    if WRITE_BEHIND:
+        # Not yet in the database; a detached instance carries the reserved id
+        _queue_rows([row])
+        return PredictionResult(**row)
+    with SessionLocal() as db:
+        return _insert_result(db, row)
+
+
+def save_prediction_results(rows):
+    """Bulk insert prediction rows (dicts of column values) in one statement.
+    Returns the new ids in input order.
+    """
+    if not rows:
+        return []
+    _stamp_rows(rows)
+    if WRITE_BEHIND:
+        return _queue_rows(rows)
+    with SessionLocal() as db:
+        return _insert_results(db, rows)
 
 
 def get_all_results():
-    db = SessionLocal()
-    try:
-        results = db.query(PredictionResult).all()
-        return results
-    finally:
-        db.close()
+    with SessionLocal() as db:
+        return _query_all(db)
 
 
 def get_results_by_city(city: str):
-    db = SessionLocal()
-    try:
-        results = db.query(PredictionResult).filter(PredictionResult.city == city).all()
-        return results
-    finally:
-        db.close()
+    with SessionLocal() as db:
+        return _query_by_city(db, city)
 
 
 def get_results_by_category(category: str):
-    db = SessionLocal()
-    try:
-        results = db.query(PredictionResult).filter(PredictionResult.predicted_category == category).all()
-        return results
-    finally:
-        db.close()
+    with SessionLocal() as db:
+        return _query_by_category(db, category)
+
+
+def _filtered(query, city=None, category=None, after=None, since=None, until=None):
+    if city is not None:
+        query = query.filter(PredictionResult.city == city)
+    if category is not None:
+        query = query.filter(PredictionResult.predicted_category == category)
+    if since is not None:
+        query = query.filter(PredictionResult.created_at >= since)
+    if until is not None:
+        query = query.filter(PredictionResult.created_at < until)
+    if after is not None:
+        query = query.filter(tuple_(PredictionResult.created_at, PredictionResult.id) > tuple_(*after))
+    return query
+
+
+_KEYSET_ORDER = (PredictionResult.created_at, PredictionResult.id)
+
+
+@DB_SECONDS.time(operation="query_page")
+def _query_page(db, limit, after=None, city=None, category=None):
+    query = _filtered(db.query(PredictionResult), city, category, after)
+    return _counted("query_page", query.order_by(*_KEYSET_ORDER).limit(limit).all())
+
+
+def get_results_page(limit: int, after: tuple[datetime, int] | None = None, city: str | None = None,
+                     category: str | None = None):
+    """Keyset-paginated results ordered by (created_at, id): the first `limit`
+    rows after the `(created_at, id)` of the previous page's last row.
+    """
+    with SessionLocal() as db:
+        return _query_page(db, limit, after, city, category)
+
+
+# Column order of the plain tuples returned by the *_rows helpers
+RESULT_COLUMNS = [column.name for column in PredictionResult.__table__.columns]
+
+
+@DB_SECONDS.time(operation="query_rows")
+def _query_rows(db, city=None, category=None):
+    stmt = _filtered(select(PredictionResult.__table__), city, category)
+    # Core connection: rows come back as tuples without building ORM objects
+    return _counted("query_rows", db.connection().execute(stmt).tuples().all())
+
+
+@DB_SECONDS.time(operation="query_page_rows")
+def _query_page_rows(db, limit, after=None, city=None, category=None):
+    stmt = _filtered(select(PredictionResult.__table__), city, category, after)
+    stmt = stmt.order_by(*_KEYSET_ORDER).limit(limit)
+    return _counted("query_page_rows", db.connection().execute(stmt).tuples().all())
+
+
+def get_result_rows(city: str | None = None, category: str | None = None):
+    """Every matching result as a plain row tuple in `RESULT_COLUMNS` order."""
+    with SessionLocal() as db:
+        return _query_rows(db, city, category)
+
+
+def get_result_rows_page(limit: int, after: tuple[datetime, int] | None = None, city: str | None = None,
+                         category: str | None = None):
+    """`get_results_page` returning plain row tuples in `RESULT_COLUMNS` order."""
+    with SessionLocal() as db:
+        return _query_page_rows(db, limit, after, city, category)
+
+
+def iter_results(after: tuple[datetime, int] | None = None, city: str | None = None,
+                 category: str | None = None, chunk_size: int = 1000):
+    """Yield result rows as dicts, fetched through a server-side cursor in chunks.
+
+    Memory use is bounded by `chunk_size` regardless of how many rows match.
+    The session stays open until the generator is exhausted or closed.
+    """
+    stmt = _filtered(select(PredictionResult.__table__), city, category, after).order_by(*_KEYSET_ORDER)
+    with SessionLocal() as db:
+        rows = db.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+        count = 0
+        try:
+            for row in rows.mappings():
+                count += 1
+                yield dict(row)
+        finally:
+            DB_ROWS.inc(count, operation="iter_results")
+
+
+def iter_result_chunks(city: str | None = None, category: str | None = None,
+                       since: datetime | None = None, until: datetime | None = None,
+                       chunk_size: int = 50000):
+    """Yield lists of up to `chunk_size` raw row tuples, in `PredictionResult.__table__`
+    column order, for rows created in [since, until).
+
+    Reads through a server-side cursor and never builds ORM objects.
+    """
+    stmt = _filtered(select(PredictionResult.__table__), city, category, since=since, until=until)
+    stmt = stmt.order_by(*_KEYSET_ORDER).execution_options(stream_results=True, yield_per=chunk_size)
+    with SessionLocal() as db:
+        # Core connection: skips the ORM result layer entirely
+        for partition in db.connection().execute(stmt).tuples().partitions(chunk_size):
+            DB_ROWS.inc(len(partition), operation="iter_result_chunks")
+            yield partition
+
+
+_ROLLUP_GROUPS = {
+    "day": ResultRollup.day,
+    "category": ResultRollup.predicted_category,
+    "city_tier": ResultRollup.city_tier,
+}
+
+
+@DB_SECONDS.time(operation="query_rollup_stats")
+def _query_rollup_stats(db, since=None, until=None, group_by=("day", "category", "city_tier")):
+    count = func.sum(ResultRollup.count)
+    bmi_sum = func.sum(ResultRollup.bmi_sum)
+    window = []
+    if since is not None:
+        window.append(ResultRollup.day >= since)
+    if until is not None:
+        window.append(ResultRollup.day < until)
+    columns = [_ROLLUP_GROUPS[name] for name in group_by]
+
+    total, total_bmi = db.execute(select(count, bmi_sum).where(*window)).one()
+    categories = db.scalar(
+        select(func.count(func.distinct(ResultRollup.predicted_category)))
+        .where(ResultRollup.count > 0, *window)
+    )
+    groups = db.execute(
+        select(*columns, count, bmi_sum).where(*window).group_by(*columns).order_by(*columns)
+    ).all() if columns else []
+
+    return {
+        "total_predictions": total or 0,
+        "unique_categories": categories,
+        "average_bmi": total_bmi / total if total else None,
+        "breakdown": [
+            {**dict(zip(group_by, row[:-2])), "count": row[-2], "average_bmi": row[-1] / row[-2]}
+            for row in groups
+        ],
+    }
+
+
+def get_rollup_stats(since: date | None = None, until: date | None = None,
+                     group_by: tuple[str, ...] = ("day", "category", "city_tier")):
+    """Totals and grouped breakdowns for days in [since, until), read from the rollups only."""
+    with SessionLocal() as db:
+        return _query_rollup_stats(db, since, until, group_by)
+
+
+@DB_SECONDS.time(operation="query_version")
+def _query_version(db):
+    # Both only ever grow with inserts; the rollup total also catches ids
+    # committed out of order by write-behind writers in other processes
+    max_id = db.scalar(select(func.max(PredictionResult.id)))
+    total = db.scalar(select(func.sum(ResultRollup.count)))
+    return max_id or 0, total or 0
+
+
+def get_results_version():
+    """Token that changes whenever rows are added to `prediction_results`."""
+    with SessionLocal() as db:
+        return _query_version(db)
 
 
 def get_statistics():
-    db = SessionLocal()
-    try:
-        total_predictions = db.query(PredictionResult).count()
-        categories = db.query(PredictionResult.predicted_category).distinct().all()
-        avg_bmi = db.query(func.avg(PredictionResult.bmi)).scalar()
-
-        return {
-            "total_predictions": total_predictions,
-            "unique_categories": len(categories),
-            "average_bmi": avg_bmi
-        }
-    finally:
-        db.close()
+    stats = get_rollup_stats(group_by=())
+    del stats["breakdown"]
+    return stats
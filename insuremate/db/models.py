@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, Index, Text
 from datetime import datetime
 from insuremate.db.base import Base
 
 class PredictionResult(Base):
     __tablename__ = "prediction_results"
+    # Serve the /results filters and their (created_at, id) keyset order from
+    # an index range scan; city- and category-only lookups use the prefix.
+    __table_args__ = (
+        Index("ix_prediction_results_created_at", "created_at"),
+        Index("ix_prediction_results_city_created_at", "city", "created_at"),
+        Index("ix_prediction_results_category_created_at", "predicted_category", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -24,5 +31,50 @@ class PredictionResult(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # Short content hash of the model artifact that made the prediction
+    model_version = Column(String, nullable=True)
+
     def __repr__(self):
         return f"<PredictionResult(id={self.id}, city={self.city}, predicted_category={self.predicted_category})>"
+
+
+class IdAllocation(Base):
+    """Next unreserved primary key per table, for backends without sequences.
+
+    Used by the write-behind writer to hand out ids before rows are inserted.
+    """
+    __tablename__ = "id_allocations"
+
+    name = Column(String, primary_key=True)
+    next_id = Column(Integer, nullable=False)
+
+
+class ResultRollup(Base):
+    """Prediction counts and BMI sums per day, category and city tier.
+
+    Maintained incrementally in the same transaction as every insert into
+    `prediction_results`, so aggregate queries never touch that table.
+    """
+    __tablename__ = "result_rollups"
+
+    day = Column(Date, primary_key=True)
+    predicted_category = Column(String, primary_key=True)
+    city_tier = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    bmi_sum = Column(Float, nullable=False, default=0.0)
+
+
+class IdempotencyKey(Base):
+    """Outcome of a `/predict` call made with an `Idempotency-Key` header.
+
+    A row is claimed (response NULL) before the prediction runs and
+    completed with the JSON response afterwards, so every worker replays
+    the same result for the key.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    # Hash of the request body; reusing a key for a different body is an error
+    fingerprint = Column(String, nullable=False)
+    response = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,129 @@
+"""Engine options, SQLite connection settings and connection pool metrics.
+
+`engine_options` turns the DB_POOL_* settings into `create_engine` keyword
+arguments with an instrumented pool class; `configure_engine` installs the
+SQLite pragmas and exports pool occupancy for an engine.
+"""
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from insuremate.core.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_WAL,
+)
+from insuremate.core.metrics import Counter, Gauge
+
+POOL_CHECKOUTS = Counter("insuremate_db_pool_checkouts_total", "Connections checked out of the pool", ["pool"])
+POOL_WAIT = Counter(
+    "insuremate_db_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection", ["pool"]
+)
+POOL_TIMEOUTS = Counter(
+    "insuremate_db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ["pool"]
+)
+POOL_CHECKED_OUT = Gauge("insuremate_db_pool_checked_out", "Connections currently in use", ["pool"])
+POOL_SATURATION = Gauge(
+    "insuremate_db_pool_saturation", "Connections in use as a fraction of pool_size + max_overflow", ["pool"]
+)
+
+_SYNCHRONOUS_LEVELS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+class _TimedCheckout:
+    # Replaced by the label given to `configure_engine`
+    metrics_label = "sync"
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool, which must keep reporting under the same label
+        pool = super().recreate()
+        pool.metrics_label = self.metrics_label
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            POOL_TIMEOUTS.inc(pool=self.metrics_label)
+            raise
+        finally:
+            POOL_WAIT.inc(time.perf_counter() - start, pool=self.metrics_label)
+            POOL_CHECKOUTS.inc(pool=self.metrics_label)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool that records how long each checkout waited."""
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool keyword arguments for `create_engine` / `create_async_engine`."""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if _is_memory_sqlite(make_url(url)):
+        # In-memory SQLite uses a per-thread singleton connection, not a queue
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        if SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        if SQLITE_SYNCHRONOUS in _SYNCHRONOUS_LEVELS:
+            cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine, label: str) -> None:
+    """Apply SQLite pragmas on connect and export pool metrics for `engine`
+    under `label`.
+
+    `engine` may be an AsyncEngine; events attach to its sync core.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+    if isinstance(sync_engine.pool, _TimedCheckout):
+        sync_engine.pool.metrics_label = label
+
+    def checked_out() -> float:
+        pool = sync_engine.pool
+        return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+    def saturation() -> float:
+        pool = sync_engine.pool
+        if not isinstance(pool, QueuePool):
+            return 0.0
+        # QueuePool keeps its configured overflow limit private; -1 means unbounded
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", DB_MAX_OVERFLOW), 0)
+        return pool.checkedout() / capacity if capacity else 0.0
+
+    POOL_CHECKED_OUT.set_function(checked_out, pool=label)
+    POOL_SATURATION.set_function(saturation, pool=label)
@@ -0,0 +1,124 @@
+"""Incrementally maintained aggregates over prediction results.
+
+Every code path that inserts into `prediction_results` calls
+`apply_rollups` in the same transaction, adding its rows to the
+(day, category, city tier) buckets of `result_rollups` with a dialect
+upsert. Statistics then read a table whose size grows with days, not
+predictions.
+
+At startup the app fills an empty rollup table from existing results. After
+a backfill or manual edits, recompute the buckets from scratch with:
+
+    python -m insuremate.db.rollups rebuild
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from typing import Any, Iterable
+
+from sqlalchemy import Date, cast, delete, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from insuremate.db import session as db_session
+from insuremate.db.models import PredictionResult, ResultRollup
+
+_KEY = ("day", "predicted_category", "city_tier")
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def rollup_deltas(rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Aggregate row dicts into per-bucket increments, sorted by bucket key.
+
+    A stable key order means concurrent transactions lock buckets in the same
+    order and cannot deadlock each other.
+    """
+    buckets: dict[tuple, list] = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        bucket = buckets[(row["created_at"].date(), row["predicted_category"], row["city_tier"])]
+        bucket[0] += 1
+        bucket[1] += row["bmi"]
+    return [
+        dict(zip(_KEY, key), count=count, bmi_sum=bmi_sum)
+        for key, (count, bmi_sum) in sorted(buckets.items())
+    ]
+
+
+def apply_rollups(db, rows: Iterable[dict[str, Any]]) -> None:
+    """Add `rows` to their rollup buckets inside the caller's transaction."""
+    deltas = rollup_deltas(rows)
+    if not deltas:
+        return
+    table = ResultRollup.__table__
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(_KEY),
+            set_={
+                "count": table.c.count + stmt.excluded.count,
+                "bmi_sum": table.c.bmi_sum + stmt.excluded.bmi_sum,
+            },
+        )
+        db.execute(stmt, deltas)
+        return
+    # Generic fallback; not safe against concurrent first inserts of a bucket
+    for delta in deltas:
+        bumped = db.execute(
+            update(table)
+            .where(*(table.c[name] == delta[name] for name in _KEY))
+            .values(count=table.c.count + delta["count"], bmi_sum=table.c.bmi_sum + delta["bmi_sum"])
+        )
+        if not bumped.rowcount:
+            db.execute(insert(table), [delta])
+
+
+def rebuild_rollups(engine=None) -> int:
+    """Recompute every bucket from `prediction_results` (on `engine`, default the
+    app's database). Returns the number of buckets.
+    """
+    results = PredictionResult.__table__
+    table = ResultRollup.__table__
+    with (Session(engine) if engine is not None else db_session.SessionLocal()) as db:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            # Hold off inserts so none are counted twice or missed
+            db.execute(text(f"LOCK TABLE {results.name} IN SHARE MODE"))
+        # SQLite's CAST(... AS DATE) yields a number; date() gives the ISO day
+        day = func.date(results.c.created_at) if dialect == "sqlite" else cast(results.c.created_at, Date)
+        db.execute(delete(table))
+        db.execute(insert(table).from_select(
+            ["day", "predicted_category", "city_tier", "count", "bmi_sum"],
+            select(day, results.c.predicted_category, results.c.city_tier,
+                   func.count(), func.sum(results.c.bmi))
+            .group_by(day, results.c.predicted_category, results.c.city_tier),
+        ))
+        buckets = db.scalar(select(func.count()).select_from(table))
+        db.commit()
+        return buckets
+
+
+def backfill_rollups(engine=None) -> int:
+    """Rebuild the buckets if `result_rollups` is empty while results exist,
+    e.g. right after `create_all` added the table to an existing database.
+    Returns the number of buckets built (0 if nothing needed doing).
+    """
+    with (Session(engine) if engine is not None else db_session.SessionLocal()) as db:
+        has_rollups = db.scalar(select(ResultRollup.day).limit(1)) is not None
+        has_results = db.scalar(select(PredictionResult.id).limit(1)) is not None
+    if has_rollups or not has_results:
+        return 0
+    return rebuild_rollups(engine)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the result_rollups aggregate table")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+    print(f"Rebuilt {rebuild_rollups()} rollup buckets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,53 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from insuremate.core.config import DATABASE_URL, get_sqlalchemy_connect_args
+from insuremate.core.config import (
+    ASYNC_DB,
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    get_sqlalchemy_connect_args,
+)
+from insuremate.db.pool import configure_engine, engine_options
 
 connect_args = get_sqlalchemy_connect_args()
 
 engine = create_engine(
     DATABASE_URL,
-    connect_args=connect_args if connect_args is not None else {}
+    connect_args=connect_args if connect_args is not None else {},
+    **engine_options(DATABASE_URL),
 )
+configure_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the backends we support, keyed by sync dialect name
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def get_async_database_url(url: str = DATABASE_URL) -> str:
+    """`sqlite:///x.db` -> `sqlite+aiosqlite:///x.db`, `postgresql://...` -> `postgresql+asyncpg://...`"""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.drivername}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Only created when enabled, so the async drivers stay optional
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = ASYNC_DATABASE_URL or get_async_database_url()
+    async_engine = create_async_engine(
+        _async_url,
+        connect_args=connect_args if connect_args is not None else {},
+        **engine_options(_async_url, is_async=True),
+    )
+    configure_engine(async_engine, "async")
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,248 @@
+"""Write-behind persistence for prediction results.
+
+When enabled, `save_prediction_result` no longer commits on the request
+path. Rows get their primary key up front from a preallocated id block, are
+queued in memory and a background thread bulk-inserts them once
+`batch_size` rows are pending or `flush_interval` has passed.
+
+The queue is bounded: if the database falls behind and it fills up,
+producers block for up to `put_timeout` seconds and then get
+`WriteBehindFull`. `stop()` drains everything still queued.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from sqlalchemy import case, func, insert, select, text, update
+from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
+
+from insuremate.core.config import (
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_MS,
+    WRITE_BEHIND_MAX_PENDING,
+    WRITE_BEHIND_PUT_TIMEOUT,
+    WRITE_BEHIND_ID_BLOCK,
+)
+from insuremate.core.metrics import Counter, Gauge
+from insuremate.db.changes import mark_results_written
+from insuremate.db.models import IdAllocation, PredictionResult
+from insuremate.db.rollups import apply_rollups
+from insuremate.db import session as db_session
+
+logger = logging.getLogger("insuremate.writer")
+
+WRITER_PENDING = Gauge("insuremate_writer_pending_rows", "Rows queued for write-behind insertion")
+WRITER_FLUSHED = Counter("insuremate_writer_flushed_rows_total", "Rows written by the write-behind flusher")
+WRITER_FLUSHES = Counter("insuremate_writer_flushes_total", "Bulk inserts issued by the write-behind flusher")
+WRITER_FAILURES = Counter("insuremate_writer_flush_failures_total", "Bulk inserts that failed and were retried")
+WRITER_DROPPED = Counter("insuremate_writer_dropped_rows_total", "Rows the database rejected outright")
+WRITER_REJECTED = Counter("insuremate_writer_rejected_rows_total", "Rows refused because the queue stayed full")
+
+_STOP = object()
+
+
+class WriteBehindFull(RuntimeError):
+    """Raised when the write-behind queue stays full for longer than the put timeout."""
+
+
+class IdAllocator:
+    """Hands out primary keys for a table in blocks reserved from the database.
+
+    PostgreSQL reserves from the column's own sequence, so ids never collide
+    with regular inserts. Other backends keep a counter row in
+    `id_allocations`; every reservation starts above both the counter and
+    the current maximum id, so rows inserted without write-behind in the
+    meantime are skipped over.
+    """
+
+    def __init__(self, table: str = PredictionResult.__tablename__, block_size: int = 100):
+        self.table = table
+        self.block_size = max(1, block_size)
+        self._ids: deque[int] = deque()
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            if not self._ids:
+                self._ids.extend(self._reserve(self.block_size))
+            return self._ids.popleft()
+
+    def _reserve(self, n: int) -> list[int]:
+        with db_session.SessionLocal() as db:
+            if db.get_bind().dialect.name == "postgresql":
+                ids = db.execute(
+                    text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                         "FROM generate_series(1, :n)"),
+                    {"table": self.table, "n": n},
+                ).scalars().all()
+                db.commit()
+                return sorted(ids)
+            return self._reserve_from_counter(db, n)
+
+    def _reserve_from_counter(self, db, n: int) -> list[int]:
+        first_free = select(func.coalesce(func.max(PredictionResult.id), 0) + 1).scalar_subquery()
+        for _ in range(3):
+            # One statement, so the maximum is read under the same write lock as the bump
+            bumped = db.execute(
+                update(IdAllocation)
+                .where(IdAllocation.name == self.table)
+                .values(next_id=case(
+                    (IdAllocation.next_id > first_free, IdAllocation.next_id), else_=first_free
+                ) + n)
+            )
+            if bumped.rowcount:
+                # Still inside the transaction that holds the write lock
+                end = db.scalar(select(IdAllocation.next_id).where(IdAllocation.name == self.table))
+                db.commit()
+                return list(range(end - n, end))
+            start = (db.scalar(select(func.max(PredictionResult.id))) or 0) + 1
+            db.add(IdAllocation(name=self.table, next_id=start))
+            try:
+                db.commit()
+            except IntegrityError:  # another process seeded the counter first
+                db.rollback()
+        raise RuntimeError(f"Could not reserve ids for {self.table}")
+
+
+class WriteBehindWriter:
+    """Buffer prediction rows in memory and bulk-insert them in the background."""
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 0.5,
+                 max_pending: int = 10000, put_timeout: float = 2.0,
+                 allocator: IdAllocator | None = None):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.allocator = allocator or IdAllocator()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        WRITER_PENDING.set_function(self._queue.qsize)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def submit(self, row: dict[str, Any]) -> None:
+        """Queue a fully populated row (including `id`), blocking while the queue is full."""
+        self.start()
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            WRITER_REJECTED.inc()
+            raise WriteBehindFull("Result storage is falling behind, try again shortly")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Flush every queued row, then stop the background thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error("Write-behind flusher did not drain within %.0fs", timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            rows = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                rows.append(item)
+            self._flush(rows)
+        # Drain whatever was queued behind the stop marker
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            self._flush(rows)
+
+    def _insert(self, rows: list[dict[str, Any]]) -> None:
+        with db_session.SessionLocal() as db:
+            db.execute(insert(PredictionResult), rows)
+            apply_rollups(db, rows)
+            db.commit()
+        mark_results_written()
+
+    def _flush(self, rows: list[dict[str, Any]]) -> None:
+        delay = 0.1
+        while True:
+            try:
+                self._insert(rows)
+            except OperationalError:
+                WRITER_FAILURES.inc()
+                logger.exception("Write-behind flush of %d rows failed; retrying", len(rows))
+                # Keep holding the batch; the bounded queue pushes back on producers
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                continue
+            except SQLAlchemyError:
+                # Not transient: isolate the offending rows instead of retrying forever
+                logger.exception("Write-behind flush of %d rows rejected; inserting row by row", len(rows))
+                self._flush_individually(rows)
+                return
+            WRITER_FLUSHES.inc()
+            WRITER_FLUSHED.inc(len(rows))
+            return
+
+    def _flush_individually(self, rows: list[dict[str, Any]]) -> None:
+        for row in rows:
+            try:
+                self._insert([row])
+            except SQLAlchemyError:
+                WRITER_DROPPED.inc()
+                logger.exception("Dropping prediction result %s", row.get("id"))
+            else:
+                WRITER_FLUSHED.inc()
+
+
+_WRITER: WriteBehindWriter | None = None
+_WRITER_LOCK = threading.Lock()
+
+
+def get_writer() -> WriteBehindWriter:
+    """Process-wide writer configured from settings."""
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _WRITER = WriteBehindWriter(
+                batch_size=WRITE_BEHIND_BATCH_SIZE,
+                flush_interval=WRITE_BEHIND_FLUSH_MS / 1000.0,
+                max_pending=WRITE_BEHIND_MAX_PENDING,
+                put_timeout=WRITE_BEHIND_PUT_TIMEOUT,
+                allocator=IdAllocator(block_size=WRITE_BEHIND_ID_BLOCK),
+            )
+        return _WRITER
+
+
+def shutdown_writer() -> None:
+    """Drain and stop the process-wide writer, if one was started."""
+    global _WRITER
+    with _WRITER_LOCK:
+        writer, _WRITER = _WRITER, None
+    if writer is not None:
+        writer.stop()
@@ -1,15 +1,27 @@
 import logging
 import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from starlette.concurrency import run_in_threadpool
 
 from insuremate.api.predict import router as predict_router
 from insuremate.api.results import router as results_router
 from insuremate.api.health import router as health_router
+from insuremate.api.metrics import MetricsMiddleware, router as metrics_router
+from insuremate.api.admin import router as admin_router
+from insuremate.db import session as db_session
 from insuremate.db.session import SessionLocal, engine
 from insuremate.db.base import Base
+from insuremate.db.rollups import backfill_rollups
+from insuremate.core import metrics
+from insuremate.core.config import METRICS_FLUSH_INTERVAL, METRICS_MULTIPROC_DIR, WARMUP_PREDICTIONS
+from insuremate.services import predict as predict_service
+from insuremate.db.writer import shutdown_writer
 # Import models to register tables with Base
 import insuremate.db.models
 
@@ -19,13 +31,84 @@ logging.basicConfig(
 )
 logger = logging.getLogger("insuremate")
 
-logger.info("Creating database tables...")
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
-except Exception as e:
-    logger.error(f"Failed to create database tables: {e}")
-    raise
+def _create_tables():
+    logger.info("Creating database tables...")
+    try:
+        try:
+            Base.metadata.create_all(bind=engine)
+        except OperationalError:
+            # Another server worker created them between the existence check and
+            # CREATE TABLE; a second pass finds them and creates nothing
+            Base.metadata.create_all(bind=engine)
+        _add_missing_columns(engine)
+        logger.info("Database tables created successfully")
+    except Exception as e:
+        logger.error(f"Failed to create database tables: {e}")
+        raise
+
+
+def _add_missing_columns(bind):
+    """Add nullable model columns that an existing table lacks.
+
+    `create_all` skips tables that already exist, so a database created before
+    a column was added (e.g. `prediction_results.model_version`) would reject
+    every insert until its migration ran.
+    """
+    preparer = bind.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        if not inspect(bind).has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspect(bind).get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                logger.error("Table %s lacks required column %s; run `alembic upgrade head`",
+                             table.name, column.name)
+                continue
+            logger.info("Adding column %s.%s", table.name, column.name)
+            try:
+                with bind.begin() as conn:
+                    conn.execute(text(
+                        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                        f"{preparer.format_column(column)} {column.type.compile(dialect=bind.dialect)}"
+                    ))
+            except (OperationalError, ProgrammingError):
+                # Another server worker added it first
+                if column.name not in {c["name"] for c in inspect(bind).get_columns(table.name)}:
+                    raise
+
+
+def _prepare():
+    _create_tables()
+    buckets = backfill_rollups(engine)
+    if buckets:
+        logger.info("Filled result_rollups from existing results (%d buckets)", buckets)
+    predict_service.get_model()
+    # Spawn inference worker processes (if configured) before the first request
+    predict_service.start()
+    predict_service.warmup(WARMUP_PREDICTIONS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    if METRICS_MULTIPROC_DIR:
+        metrics.start_multiprocess(METRICS_MULTIPROC_DIR, METRICS_FLUSH_INTERVAL)
+    await run_in_threadpool(_prepare)
+    app.state.ready = True
+    logger.info("InsureMate app ready")
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        predict_service.shutdown()
+        # Drain queued write-behind results before the process exits
+        shutdown_writer()
+        if db_session.async_engine is not None:
+            await db_session.async_engine.dispose()
+        metrics.stop_multiprocess()
+
 
 app = FastAPI(
     title="InsureMate API",
@@ -33,9 +116,11 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -45,6 +130,8 @@ app.add_middleware(
 )
 
 app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(admin_router, tags=["admin"])
 
 app.include_router(predict_router, tags=["predictions"])
 app.include_router(results_router, tags=["results"])
@@ -2,9 +2,66 @@
 Pydantic models for InsureMate Insurance Premium Prediction System
 """
 
-from pydantic import BaseModel, computed_field
+import csv
+from functools import cached_property
+from pathlib import Path
+
+from pydantic import BaseModel, computed_field, model_validator
 from typing import Literal, Optional
 from datetime import datetime
+from time import perf_counter
+
+from insuremate.core.config import CITY_TIERS_PATH
+from insuremate.core.metrics import Histogram
+
+VALIDATION_SECONDS = Histogram(
+    "insuremate_input_validation_seconds", "Time to validate one applicant record"
+)
+
+
+def load_city_tiers(path: Path) -> dict[str, int]:
+    """Read the `city,tier` CSV at `path` into a city -> tier mapping"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["city"].strip(): int(row["tier"]) for row in csv.DictReader(f) if row["city"].strip()}
+
+
+CITY_TIERS = load_city_tiers(CITY_TIERS_PATH)
+TIER_1_CITIES = [city for city, tier in CITY_TIERS.items() if tier == 1]
+TIER_2_CITIES = [city for city, tier in CITY_TIERS.items() if tier == 2]
+
+
+# Computed once per Userinput; changing a field (assignment or
+# model_copy(update=...)) drops the cached values
+_DERIVED_FIELDS = ("bmi", "lifestyle_risk", "age_group", "city_tier")
+
+
+def get_city_tier(city: str) -> int:
+    """Map a city name to its tier (3 for cities not in the table)"""
+    return CITY_TIERS.get(city, 3)
+
+
+def get_lifestyle_risk(smoker: bool, bmi: float) -> str:
+    """Lifestyle risk from smoking and BMI; non-smokers are always low risk"""
+    if not smoker:
+        return "low"
+    if bmi > 30:
+        return "high"
+    elif bmi > 27:
+        return "medium"
+    else:
+        return "low"
+
+
+def get_age_group(age: int) -> str:
+    """Categorize age into groups"""
+    if age < 25:
+        return "young"
+    elif age < 45:
+        return "adult"
+    elif age < 60:
+        return "middle-aged"
+    else:
+        return "senior"
 
 
 class Userinput(BaseModel):
@@ -20,6 +77,16 @@ class Userinput(BaseModel):
     
     class Config:
         validate_assignment = True
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _timed(cls, data, handler):
+        # Covers FastAPI's request-body validation as well as Userinput(**record)
+        start = perf_counter()
+        try:
+            return handler(data)
+        finally:
+            VALIDATION_SECONDS.observe(perf_counter() - start)
     
     def __init__(self, **data):
         super().__init__(**data)
@@ -34,56 +101,60 @@ class Userinput(BaseModel):
         if self.income_lpa <= 0:
             raise ValueError("Income must be greater than 0")
     
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._forget_derived()
+
+    def model_copy(self, *, update=None, deep=False):
+        copied = super().model_copy(update=update, deep=deep)
+        if update:
+            copied._forget_derived()
+        return copied
+
+    def __eq__(self, other):
+        # The cached derived values sit in __dict__, which pydantic < 2.6
+        # compares wholesale; equal inputs stay equal whichever were read
+        if type(other) is not type(self):
+            return NotImplemented
+        return (
+            self._fields_only() == other._fields_only()
+            and self.__pydantic_private__ == other.__pydantic_private__
+            and self.__pydantic_extra__ == other.__pydantic_extra__
+        )
+
+    def _fields_only(self) -> dict:
+        return {name: value for name, value in self.__dict__.items() if name not in _DERIVED_FIELDS}
+
+    def _forget_derived(self) -> None:
+        for name in _DERIVED_FIELDS:
+            self.__dict__.pop(name, None)
+
     @computed_field
-    @property
+    @cached_property
     def bmi(self) -> float:
         """Calculate BMI from weight (kg) and height (cm)"""
-        return self.weight / ((self.height)**2)
+        return self.weight / (self.height * self.height)
     
     @computed_field
-    @property
+    @cached_property
     def lifestyle_risk(self) -> str:
         """Determine lifestyle risk based on smoking and BMI"""
-        if self.smoker and self.bmi > 30:
-            return "high"
-        elif self.smoker and self.bmi > 27:
-            return "medium"
-        else:
+        if not self.smoker:
             return "low"
+        return get_lifestyle_risk(True, self.bmi)
     
     @computed_field
-    @property
+    @cached_property
     def age_group(self) -> str:
         """Categorize age into groups"""
-        if self.age < 25:
-            return "young"
-        elif self.age < 45:
-            return "adult"
-        elif self.age < 60:
-            return "middle-aged"
-        else:
-            return "senior"
+        return get_age_group(self.age)
     
     @computed_field
-    @property   
+    @cached_property
     def city_tier(self) -> int:
         """Determine city tier based on city classification"""
-        tier_1 = ["Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune"]
-        tier_2 = [
-            "Jaipur", "Chandigarh", "Indore", "Lucknow", "Patna", "Ranchi", "Visakhapatnam", "Coimbatore",
-            "Bhopal", "Nagpur", "Vadodara", "Surat", "Rajkot", "Jodhpur", "Raipur", "Amritsar", "Varanasi",
-            "Agra", "Dehradun", "Mysore", "Jabalpur", "Guwahati", "Thiruvananthapuram", "Ludhiana", "Nashik",
-            "Allahabad", "Udaipur", "Aurangabad", "Hubli", "Belgaum", "Salem", "Vijayawada", "Tiruchirappalli",
-            "Bhavnagar", "Gwalior", "Dhanbad", "Bareilly", "Aligarh", "Gaya", "Kozhikode", "Warangal",
-            "Kolhapur", "Bilaspur", "Jalandhar", "Noida", "Guntur", "Asansol", "Siliguri"
-        ]
-        
-        if self.city in tier_1:
-            return 1
-        elif self.city in tier_2:
-            return 2
-        else:
-            return 3
+        return get_city_tier(self.city)
 
 
 class PredictionResponse(BaseModel):
@@ -111,6 +182,7 @@ class PredictionResultSchema(BaseModel):
     city_tier: int
     predicted_category: str
     created_at: str
+    model_version: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -120,6 +192,7 @@ class ResultsResponse(BaseModel):
     """Model for results endpoint response"""
     total_results: int
     results: list[PredictionResultSchema]
+    next_cursor: Optional[str] = None
 
 
 class ResultsByCityResponse(BaseModel):
@@ -127,6 +200,7 @@ class ResultsByCityResponse(BaseModel):
     city: str
     total_results: int
     results: list[PredictionResultSchema]
+    next_cursor: Optional[str] = None
 
 
 class ResultsByCategoryResponse(BaseModel):
@@ -134,3 +208,4 @@ class ResultsByCategoryResponse(BaseModel):
     category: str
     total_results: int
     results: list[PredictionResultSchema]
+    next_cursor: Optional[str] = None
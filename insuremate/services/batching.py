@@ -0,0 +1,184 @@
+"""Dynamic micro-batching for single-row predictions.
+
+Concurrent callers submit one feature row each. A background thread collects
+rows until either the batching window elapses or the batch is full, scores
+them with one call to `predict_rows` and resolves each caller's future with
+its own outcome.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from insuremate.core.metrics import Counter, Gauge
+
+logger = logging.getLogger("insuremate.batching")
+
+BATCHER_WINDOW = Gauge(
+    "insuremate_batcher_window_seconds", "Maximum time a request waits for its batch to fill"
+)
+BATCHER_MAX_BATCH_SIZE = Gauge(
+    "insuremate_batcher_max_batch_size", "Maximum number of rows scored in one batch"
+)
+BATCHER_QUEUE_DEPTH = Gauge(
+    "insuremate_batcher_queue_depth", "Rows waiting to be picked up by the batcher"
+)
+BATCHER_LAST_BATCH_SIZE = Gauge(
+    "insuremate_batcher_last_batch_size", "Number of rows in the most recently scored batch"
+)
+BATCHER_BATCHES = Counter(
+    "insuremate_batcher_batches_total", "Batches scored by the micro-batcher"
+)
+BATCHER_ROWS = Counter(
+    "insuremate_batcher_rows_total", "Rows scored through the micro-batcher"
+)
+
+_STOP = object()
+
+
+class BatcherFull(RuntimeError):
+    """Raised when the batcher queue is at capacity."""
+
+
+class BatcherTimeout(RuntimeError):
+    """Raised when a queued row is not scored within the caller's timeout."""
+
+
+class MicroBatcher:
+    """Collect concurrent single-row requests into batched model calls.
+
+    `predict_rows` receives a list of feature rows and must return one entry
+    per row: the prediction, or an exception instance for rows that failed.
+    It may instead return a Future of that list (e.g. from a process pool);
+    up to `max_in_flight` such batches are then scored concurrently while
+    the next batch is collected.
+    """
+
+    def __init__(
+        self,
+        predict_rows: Callable[[list], list | Future],
+        window_ms: float = 2.0,
+        max_batch_size: int = 64,
+        max_queue: int = 1024,
+        max_in_flight: int = 1,
+    ):
+        self._predict_rows = predict_rows
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._max_in_flight = max(1, max_in_flight)
+
+        BATCHER_WINDOW.set(self.window)
+        BATCHER_MAX_BATCH_SIZE.set(self.max_batch_size)
+        BATCHER_QUEUE_DEPTH.set_function(self._queue.qsize)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="predict-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, row: Any) -> Future:
+        """Queue a row for scoring and return a future for its prediction."""
+        self.start()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((row, future))
+        except queue.Full:
+            raise BatcherFull("Prediction queue is full, try again shortly")
+        return future
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Score anything already queued, then stop the worker thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        # Wait for batches still being scored elsewhere
+        deadline = time.monotonic() + timeout
+        for _ in range(self._max_in_flight):
+            if not self._in_flight.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                logger.warning("Batched predictions still in flight after %.0fs", timeout)
+                break
+        else:
+            for _ in range(self._max_in_flight):
+                self._in_flight.release()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+            if stopping:
+                return
+
+    def _dispatch(self, batch: list) -> None:
+        # Claim each future: from here on callers can no longer cancel it, so
+        # resolving cannot race a cancel. Rows whose caller already gave up are dropped.
+        batch = [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        BATCHER_BATCHES.inc()
+        BATCHER_ROWS.inc(len(batch))
+        BATCHER_LAST_BATCH_SIZE.set(len(batch))
+        rows = [row for row, _ in batch]
+        self._in_flight.acquire()
+        try:
+            outcomes = self._predict_rows(rows)
+        except Exception as e:
+            logger.exception("Batched prediction failed")
+            outcomes = [e] * len(batch)
+        if isinstance(outcomes, Future):
+            outcomes.add_done_callback(lambda done: self._resolve_later(batch, done))
+            return
+        self._in_flight.release()
+        self._resolve(batch, outcomes)
+
+    def _resolve_later(self, batch: list, done: Future) -> None:
+        self._in_flight.release()
+        try:
+            outcomes = done.result()
+        except Exception as e:
+            logger.exception("Batched prediction failed")
+            outcomes = [e] * len(batch)
+        self._resolve(batch, outcomes)
+
+    @staticmethod
+    def _resolve(batch: list, outcomes: list) -> None:
+        if len(outcomes) != len(batch):
+            logger.error("Batched prediction returned %d outcomes for %d rows", len(outcomes), len(batch))
+            error = RuntimeError(f"Predictor returned {len(outcomes)} outcomes for {len(batch)} rows")
+            # Fail every row rather than guess which outcome belongs to which
+            outcomes = [error] * len(batch)
+        for (_, future), outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
@@ -0,0 +1,82 @@
+"""Bounded in-process cache with TTL expiry and LRU or FIFO eviction.
+
+Each cache is named; hits, misses and evictions are exported per name.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from insuremate.core.metrics import Counter, Gauge
+
+CACHE_HITS = Counter("insuremate_cache_hits_total", "Cache lookups answered from the cache", ["cache"])
+CACHE_MISSES = Counter("insuremate_cache_misses_total", "Cache lookups that missed", ["cache"])
+CACHE_EVICTIONS = Counter(
+    "insuremate_cache_evictions_total", "Entries removed to respect size or TTL", ["cache", "reason"]
+)
+CACHE_ENTRIES = Gauge("insuremate_cache_entries", "Entries currently held", ["cache"])
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe mapping bounded by `maxsize` whose entries expire after `ttl` seconds.
+
+    `policy="lru"` refreshes an entry's position on every hit; `policy="fifo"`
+    evicts strictly in insertion order. A `ttl` of 0 disables expiry.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float = 0.0, policy: str = "lru"):
+        if policy not in ("lru", "fifo"):
+            raise ValueError(f"Unknown eviction policy {policy!r}")
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.policy = policy
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        CACHE_ENTRIES.set(0, cache=name)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl and entry[0] <= now:
+                del self._data[key]
+                CACHE_EVICTIONS.inc(cache=self.name, reason="ttl")
+                CACHE_ENTRIES.set(len(self._data), cache=self.name)
+                entry = _MISSING
+            if entry is _MISSING:
+                CACHE_MISSES.inc(cache=self.name)
+                return default
+            if self.policy == "lru":
+                self._data.move_to_end(key)
+        CACHE_HITS.inc(cache=self.name)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                CACHE_EVICTIONS.inc(cache=self.name, reason="size")
+            CACHE_ENTRIES.set(len(self._data), cache=self.name)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+            CACHE_ENTRIES.set(len(self._data), cache=self.name)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            CACHE_ENTRIES.set(0, cache=self.name)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,158 @@
+"""Bulk export of prediction results as gzip CSV, Parquet or Arrow IPC.
+
+Rows are read in chunks through a server-side cursor as plain tuples and
+encoded chunk by chunk, so memory stays bounded by the chunk size however
+large the table is. Each chunk becomes one Parquet row group or Arrow record
+batch. Parquet and Arrow need the optional `pyarrow` package.
+
+    python -m insuremate.services.export parquet --out results.parquet --since 2026-01-01
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from sqlalchemy import Boolean, DateTime, Float, Integer
+
+from insuremate.core.config import EXPORT_CHUNK_SIZE
+from insuremate.db.crud import iter_result_chunks
+from insuremate.db.models import PredictionResult
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional: only needed for parquet / arrow
+    pa = None
+
+# format -> (media type, file extension)
+FORMATS = {
+    "csv": ("application/gzip", ".csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+}
+
+COLUMNS = [column.name for column in PredictionResult.__table__.columns]
+
+
+class ExportUnavailable(Exception):
+    """The requested format needs an optional dependency that is not installed."""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that buffers output until it is drained."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _arrow_schema():
+    types = {Integer: pa.int64(), Float: pa.float64(), Boolean: pa.bool_(), DateTime: pa.timestamp("us")}
+    fields = []
+    for column in PredictionResult.__table__.columns:
+        arrow_type = next((t for sa_type, t in types.items() if isinstance(column.type, sa_type)), pa.string())
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable))
+    return pa.schema(fields)
+
+
+def _csv_stream(chunks: Iterable[list[tuple]]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    # Level 6 (gzip's own default) is about twice as fast as 9 for ~3% more bytes
+    compressed = gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=6)
+    text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(COLUMNS)
+    created_at = COLUMNS.index("created_at")
+    for chunk in chunks:
+        for row in chunk:
+            row = list(row)
+            row[created_at] = row[created_at].isoformat()
+            writer.writerow(row)
+        text.flush()
+        yield sink.drain()
+    text.close()  # writes the gzip trailer; the sink itself stays open
+    yield sink.drain()
+
+
+def _arrow_stream(chunks: Iterable[list[tuple]], fmt: str) -> Iterator[bytes]:
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+    for chunk in chunks:
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_results(fmt: str = "csv", city: str | None = None, category: str | None = None,
+                   since: datetime | None = None, until: datetime | None = None,
+                   chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encoded export of the results created in [since, until), as a stream of byte chunks.
+
+    Raises ValueError for an unknown format and ExportUnavailable when the
+    format needs pyarrow; both are checked before any row is read.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    if fmt != "csv" and pa is None:
+        raise ExportUnavailable(f"The {fmt} export format requires pyarrow")
+    chunks = iter_result_chunks(city=city, category=category, since=since, until=until,
+                                chunk_size=chunk_size)
+    return _csv_stream(chunks) if fmt == "csv" else _arrow_stream(chunks, fmt)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export prediction results")
+    parser.add_argument("format", choices=sorted(FORMATS))
+    parser.add_argument("--out", type=Path, help="output file (default: prediction_results<ext>)")
+    parser.add_argument("--city")
+    parser.add_argument("--category")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="ISO date/time, inclusive")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="ISO date/time, exclusive")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    out = args.out or Path("prediction_results" + FORMATS[args.format][1])
+    try:
+        stream = export_results(args.format, city=args.city, category=args.category,
+                                since=args.since, until=args.until, chunk_size=args.chunk_size)
+    except ExportUnavailable as e:
+        print(e, file=sys.stderr)
+        return 1
+    with open(out, "wb") as f:
+        for data in stream:
+            f.write(data)
+    print(f"Wrote {out} ({out.stat().st_size / 1024:.1f} KiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Pandas-free inference for the pickled preprocessing + estimator pipeline.
+
+The model is a scikit-learn `Pipeline` whose first step is a
+`ColumnTransformer` (one-hot encoded categoricals plus passthrough numerics)
+and whose last step is the estimator. `FastPipeline` inspects the fitted
+transformer once, precomputes the one-hot column offset of every known
+category and then writes feature rows straight into a NumPy matrix that is
+handed to the estimator, skipping DataFrame construction and the
+ColumnTransformer's pandas handling.
+
+`FastPipeline.from_pipeline` returns None for pipeline shapes it does not
+understand, so callers can keep using `model.predict(DataFrame)`.
+"""
+
+import logging
+import threading
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger("insuremate.fast_inference")
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class _OneHotBlock:
+    """Maps the values of one categorical column to absolute output columns."""
+
+    def __init__(self, column: str, categories, offset: int, strict: bool):
+        self.column = column
+        self.offsets = {value: offset + i for i, value in enumerate(categories.tolist())}
+        self.strict = strict
+
+
+class FastPipeline:
+    """Encode feature rows without pandas and score them with the fitted estimator."""
+
+    def __init__(self, estimator, n_features: int, onehot: list[_OneHotBlock],
+                 passthrough: list[tuple[str, int]]):
+        self.estimator = estimator
+        self.n_features = n_features
+        self.onehot = onehot
+        self.passthrough = passthrough
+        self._local = threading.local()
+
+    @classmethod
+    def from_pipeline(cls, model, feature_columns: list[str]) -> "FastPipeline | None":
+        """Build an engine for `model`, or return None if its structure is unsupported."""
+        try:
+            return cls._inspect(model, feature_columns)
+        except _Unsupported as e:
+            logger.info("Fast inference unavailable: %s", e)
+            return None
+
+    @classmethod
+    def _inspect(cls, model, feature_columns: list[str]) -> "FastPipeline":
+        from sklearn.compose import ColumnTransformer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+        if not isinstance(model, Pipeline) or len(model.steps) != 2:
+            raise _Unsupported("expected a two-step Pipeline")
+        preprocessor = model.steps[0][1]
+        estimator = model.steps[-1][1]
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise _Unsupported("first step is not a ColumnTransformer")
+        if getattr(preprocessor, "sparse_output_", False):
+            raise _Unsupported("ColumnTransformer produces sparse output")
+        if hasattr(estimator, "feature_names_in_"):
+            raise _Unsupported("estimator was fitted on named features")
+
+        known = set(feature_columns)
+        onehot: list[_OneHotBlock] = []
+        passthrough: list[tuple[str, int]] = []
+        for name, transformer, columns in preprocessor.transformers_:
+            block = preprocessor.output_indices_[name]
+            if transformer == "drop" or block.stop == block.start:
+                continue
+            if not all(isinstance(c, str) and c in known for c in columns):
+                raise _Unsupported(f"transformer {name!r} uses columns outside the feature set")
+            if isinstance(transformer, OneHotEncoder):
+                if transformer.drop is not None or getattr(transformer, "_infrequent_enabled", False):
+                    raise _Unsupported(f"encoder {name!r} drops or groups categories")
+                if transformer.handle_unknown not in ("error", "ignore"):
+                    raise _Unsupported(f"encoder {name!r} uses handle_unknown={transformer.handle_unknown!r}")
+                offset = block.start
+                for column, categories in zip(columns, transformer.categories_):
+                    onehot.append(_OneHotBlock(column, categories, offset,
+                                               strict=transformer.handle_unknown == "error"))
+                    offset += len(categories)
+                if offset != block.stop:
+                    raise _Unsupported(f"encoder {name!r} output width mismatch")
+            elif transformer == "passthrough" or (
+                isinstance(transformer, FunctionTransformer) and transformer.func is None
+            ):
+                if block.stop - block.start != len(columns):
+                    raise _Unsupported(f"passthrough {name!r} output width mismatch")
+                passthrough.extend((c, block.start + i) for i, c in enumerate(columns))
+            else:
+                raise _Unsupported(f"unsupported transformer {type(transformer).__name__}")
+
+        n_features = sum(len(b.offsets) for b in onehot) + len(passthrough)
+        if n_features != getattr(estimator, "n_features_in_", n_features):
+            raise _Unsupported("encoded width does not match the estimator")
+        return cls(estimator, n_features, onehot, passthrough)
+
+    def with_estimator(self, estimator) -> "FastPipeline":
+        """Same encoding, different estimator (e.g. a compiled form of the same model)."""
+        return type(self)(estimator, self.n_features, self.onehot, self.passthrough)
+
+    def encode(self, columns: dict[str, np.ndarray]) -> tuple[np.ndarray, dict[int, str]]:
+        """Encode feature columns into the estimator's input matrix.
+
+        Returns the matrix and a map of row position -> error for rows holding
+        categories a strict encoder would reject (those rows are left zeroed).
+        """
+        n = len(next(iter(columns.values())))
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+        errors: dict[int, str] = {}
+        rows = np.arange(n)
+        for block in self.onehot:
+            values = columns[block.column]
+            offsets = block.offsets
+            cols = np.fromiter((offsets.get(v, -1) for v in values), dtype=np.intp, count=n)
+            known = cols >= 0
+            X[rows[known], cols[known]] = 1.0
+            if block.strict:
+                for j in np.flatnonzero(~known):
+                    errors.setdefault(
+                        int(j), f"Found unknown category {values[j]!r} in column '{block.column}'"
+                    )
+        for column, index in self.passthrough:
+            X[:, index] = columns[column]
+        return X, errors
+
+    def predict_columns(self, columns: dict[str, np.ndarray]) -> list:
+        """Score feature columns; failing rows yield a ValueError instead of a label."""
+        X, errors = self.encode(columns)
+        outcomes: list[Any] = [ValueError(errors[j]) if j in errors else None for j in range(len(X))]
+        keep = np.array([j not in errors for j in range(len(X))], dtype=bool)
+        if keep.any():
+            for j, label in zip(np.flatnonzero(keep), self.estimator.predict(X[keep])):
+                outcomes[j] = label
+        return outcomes
+
+    def predict_row(self, row: dict[str, Any]):
+        """Score a single row using a per-thread preallocated input buffer."""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = np.zeros((1, self.n_features), dtype=np.float64)
+        else:
+            buffer.fill(0.0)
+        for block in self.onehot:
+            index = block.offsets.get(row[block.column])
+            if index is not None:
+                buffer[0, index] = 1.0
+            elif block.strict:
+                raise ValueError(
+                    f"Found unknown category {row[block.column]!r} in column '{block.column}'"
+                )
+        for column, index in self.passthrough:
+            buffer[0, index] = row[column]
+        return self.estimator.predict(buffer)[0]
+
+
+def parity_mismatches(engine: FastPipeline, reference, columns: dict[str, np.ndarray]) -> list[int]:
+    """Row positions where `engine` disagrees with `reference(columns)`.
+
+    Both callables return one label or exception per row; rows agree when
+    both fail or both produce the same label.
+    """
+    expected = reference(columns)
+    actual = engine.predict_columns(columns)
+    mismatches = []
+    for j, (a, b) in enumerate(zip(expected, actual)):
+        a_failed, b_failed = isinstance(a, Exception), isinstance(b, Exception)
+        if a_failed != b_failed or (not a_failed and a != b):
+            mismatches.append(j)
+    return mismatches
@@ -0,0 +1,194 @@
+"""Idempotency keys for `/predict`.
+
+A client that retries a timed-out request with the same `Idempotency-Key`
+header gets the original response back (same `result_id`) without another
+model call or database insert. Outcomes are kept for IDEMPOTENCY_TTL
+seconds in a bounded in-memory cache; concurrent duplicates in one worker
+wait for the first call instead of running their own.
+
+With IDEMPOTENCY_DB enabled the `idempotency_keys` table makes this hold
+across workers: the first request claims the key with an insert, and
+duplicates arriving at other workers poll the row until its response is
+written, answering 409 if it takes longer than IDEMPOTENCY_WAIT_TIMEOUT. A
+claim left pending for twice that long (e.g. by a crashed worker) is taken
+over. Failed calls release their key,
+so a retry runs again.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from insuremate.core.metrics import Counter
+from insuremate.db import session as db_session
+from insuremate.db.models import IdempotencyKey
+from insuremate.services.cache import TTLCache
+from insuremate.services.singleflight import SingleFlight
+
+logger = logging.getLogger("insuremate.idempotency")
+
+IDEMPOTENT_REQUESTS = Counter(
+    "insuremate_idempotent_requests_total",
+    "Requests carrying an Idempotency-Key, by outcome",
+    ["outcome"],
+)
+
+# Seconds between sweeps of expired rows from the shared table
+_PURGE_INTERVAL = 60.0
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used for a request with a different body."""
+
+
+class IdempotencyInProgress(Exception):
+    """Another worker is still processing the key after the wait timeout."""
+
+
+class Stored(NamedTuple):
+    fingerprint: str
+    response: dict[str, Any]
+
+
+def fingerprint(payload: str) -> str:
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Runs a call at most once per key and replays its response afterwards."""
+
+    def __init__(self, ttl: float, maxsize: int, shared: bool = False, wait_timeout: float = 30.0,
+                 poll_interval: float = 0.05):
+        self.ttl = ttl
+        self.shared = shared
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._cache = TTLCache("idempotency", maxsize, ttl=ttl)
+        self._flight = SingleFlight("idempotency")
+        self._purged_at = float("-inf")
+
+    async def run(self, key: str, fingerprint: str,
+                  call: Callable[[], Awaitable[dict[str, Any]]]) -> tuple[dict[str, Any], bool]:
+        """`(response, replayed)`: the stored response for `key`, or `call()`'s.
+
+        Raises `IdempotencyKeyReused` if `key` belongs to a different request
+        and `IdempotencyInProgress` if another worker holds it for too long.
+        """
+        executed = False
+
+        async def execute() -> Stored:
+            nonlocal executed
+            stored = await self._lookup_or_claim(key, fingerprint)
+            if stored is not None:
+                return stored
+            executed = True
+            return await self._execute(key, fingerprint, call)
+
+        stored = self._cache.get(key)
+        if stored is None:
+            stored = await self._flight.do(key, execute)
+        if stored.fingerprint != fingerprint:
+            IDEMPOTENT_REQUESTS.inc(outcome="mismatch")
+            raise IdempotencyKeyReused(f"Idempotency-Key {key!r} was used for a different request")
+        IDEMPOTENT_REQUESTS.inc(outcome="executed" if executed else "replayed")
+        return stored.response, not executed
+
+    async def _execute(self, key: str, fingerprint: str, call) -> Stored:
+        try:
+            response = await call()
+        except BaseException:
+            if self.shared:
+                await run_in_threadpool(self._release, key)
+            raise
+        stored = Stored(fingerprint, response)
+        self._cache.set(key, stored)
+        if self.shared:
+            await run_in_threadpool(self._complete, key, response)
+        return stored
+
+    async def _lookup_or_claim(self, key: str, fingerprint: str) -> Stored | None:
+        """The stored outcome for `key`, or None once this worker has claimed it."""
+        if not self.shared:
+            return None
+        if time.monotonic() - self._purged_at >= _PURGE_INTERVAL:
+            self._purged_at = time.monotonic()
+            await run_in_threadpool(self.purge_expired)
+        deadline = asyncio.get_running_loop().time() + self.wait_timeout
+        while True:
+            stored = await run_in_threadpool(self._try_claim, key, fingerprint)
+            if stored is not None and stored.response is not None:
+                self._cache.set(key, stored)
+                return stored
+            if stored is None:
+                return None
+            if stored.fingerprint != fingerprint:
+                # No need to wait for a response that will not be ours
+                return stored
+            if asyncio.get_running_loop().time() >= deadline:
+                IDEMPOTENT_REQUESTS.inc(outcome="in_progress")
+                raise IdempotencyInProgress(f"Idempotency-Key {key!r} is still being processed")
+            await asyncio.sleep(self.poll_interval)
+
+    def _try_claim(self, key: str, fingerprint: str) -> Stored | None:
+        """Insert a pending row for `key`; None if it was ours to take.
+
+        Otherwise returns the existing row, with `response` None while its
+        owner is still working on it.
+        """
+        now = datetime.utcnow()
+        with db_session.SessionLocal() as db:
+            for _ in range(3):
+                db.add(IdempotencyKey(key=key, fingerprint=fingerprint, created_at=now))
+                try:
+                    db.commit()
+                    return None
+                except IntegrityError:
+                    db.rollback()
+                row = db.scalar(select(IdempotencyKey).where(IdempotencyKey.key == key))
+                if row is None:
+                    continue  # released in the meantime
+                age = (now - row.created_at).total_seconds()
+                abandoned = row.response is None and age > 2 * self.wait_timeout
+                if age > self.ttl or abandoned:
+                    # Expired, or its owner died: remove exactly that row and try again
+                    db.execute(delete(IdempotencyKey).where(
+                        IdempotencyKey.key == key, IdempotencyKey.created_at == row.created_at
+                    ))
+                    db.commit()
+                    continue
+                response = json.loads(row.response) if row.response is not None else None
+                return Stored(row.fingerprint, response)
+        raise RuntimeError(f"Could not claim Idempotency-Key {key!r}")
+
+    def _complete(self, key: str, response: dict[str, Any]) -> None:
+        with db_session.SessionLocal() as db:
+            row = db.get(IdempotencyKey, key)
+            if row is None:
+                logger.warning("Idempotency-Key %r vanished before its response was stored", key)
+                return
+            row.response = json.dumps(response, default=str)
+            row.created_at = datetime.utcnow()
+            db.commit()
+
+    def _release(self, key: str) -> None:
+        with db_session.SessionLocal() as db:
+            db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.key == key, IdempotencyKey.response.is_(None)
+            ))
+            db.commit()
+
+    def purge_expired(self) -> int:
+        """Delete rows older than the TTL from the shared table; returns how many."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        with db_session.SessionLocal() as db:
+            deleted = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+            db.commit()
+        return deleted
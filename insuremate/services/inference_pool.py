@@ -0,0 +1,139 @@
+"""Model inference in a pool of worker processes.
+
+Each worker imports `insuremate.services.predict` once and installs the
+model artifact it was started with (the exact bytes the serving process
+loaded), building the configured inference engine in that process; requests
+then ship only feature columns and labels across the process boundary. This
+lets one service instance keep several cores busy with scoring instead of
+serialising it on the GIL.
+
+Workers are started with the `spawn` method so they never inherit the
+parent's threads or open database connections.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+logger = logging.getLogger("insuremate.inference_pool")
+
+
+def _init_worker(raw: bytes | None = None) -> None:
+    # Workers score in-process; they must never start a pool of their own
+    os.environ["INFERENCE_PROCESSES"] = "0"
+    from insuremate.services import predict
+
+    predict._POOL = None
+    if raw is None:
+        predict.get_model()
+    else:
+        predict.REGISTRY.install(predict._prepare_model(raw, predict._MODEL_PATH), raw)
+
+
+def _score_columns(columns: dict[str, np.ndarray]) -> list:
+    from insuremate.services import predict
+
+    return predict._score_columns_uncached(columns)
+
+
+def _worker_ready(barrier) -> int:
+    # Every worker must hold one of these at the same time, so all of them start
+    barrier.wait()
+    return os.getpid()
+
+
+class InferencePool:
+    """Lazily started process pool that scores feature columns."""
+
+    def __init__(self, processes: int, min_chunk_rows: int = 256):
+        self.processes = max(1, processes)
+        self.min_chunk_rows = max(1, min_chunk_rows)
+        self._executor: ProcessPoolExecutor | None = None
+        self._initargs: tuple = ()
+        self._lock = threading.Lock()
+
+    def _new_executor(self, initargs: tuple) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=initargs,
+        )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor(self._initargs)
+            return self._executor
+
+    def _warm(self, executor: ProcessPoolExecutor, timeout: float) -> None:
+        with multiprocessing.get_context("spawn").Manager() as manager:
+            barrier = manager.Barrier(self.processes, timeout=timeout)
+            futures = [executor.submit(_worker_ready, barrier) for _ in range(self.processes)]
+            pids = {future.result() for future in futures}
+        logger.info("Inference pool ready with %d worker process(es)", len(pids))
+
+    def start(self, timeout: float = 300.0) -> None:
+        """Start every worker and wait until each has loaded the model."""
+        self._warm(self._get_executor(), timeout)
+
+    def restart(self, initargs: tuple, timeout: float = 300.0) -> None:
+        """Replace the workers with ones initialised with `initargs`.
+
+        If the pool is running, the new workers are started and loaded before
+        any work is routed to them; the old ones finish what they were
+        already given, then exit.
+        """
+        with self._lock:
+            self._initargs = initargs
+            if self._executor is None:
+                return
+        executor = self._new_executor(initargs)
+        try:
+            self._warm(executor, timeout)
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        with self._lock:
+            previous, self._executor = self._executor, executor
+        if previous is not None:
+            # Queued work still completes; this only stops accepting new work
+            previous.shutdown(wait=False)
+
+    def submit(self, columns: dict[str, np.ndarray]) -> Future:
+        """Score `columns` in one worker; the future resolves to one outcome per row."""
+        try:
+            return self._get_executor().submit(_score_columns, columns)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer); start a fresh pool once
+            logger.error("Inference pool is broken; restarting it")
+            with self._lock:
+                broken, self._executor = self._executor, None
+            if broken is not None:
+                broken.shutdown(wait=False, cancel_futures=True)
+            return self._get_executor().submit(_score_columns, columns)
+
+    def score_columns(self, columns: dict[str, np.ndarray]) -> list:
+        """Score `columns`, spreading large batches across the workers."""
+        n = len(next(iter(columns.values())))
+        chunks = max(1, min(self.processes, n // self.min_chunk_rows))
+        if chunks == 1:
+            return self.submit(columns).result()
+        bounds = np.linspace(0, n, chunks + 1, dtype=int)
+        futures = [
+            self.submit({name: values[start:stop] for name, values in columns.items()})
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+        return [outcome for future in futures for outcome in future.result()]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Let queued work finish, then stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,207 @@
+"""Lookup-table inference for the low-cardinality feature space.
+
+Every model input except the passthrough numerics (bmi, income_lpa) is a
+one-hot encoded category, so the forest's output for one combination of
+categories is a piecewise-constant function of the numerics whose breakpoints
+are the split thresholds reachable under that combination. `LookupTable`
+enumerates every combination once, records those thresholds per numeric
+feature and precomputes the predicted class for each cell of the resulting
+grid. A prediction is then a category index lookup plus one binary search
+per numeric feature.
+
+The grid is filled from the forest's leaves: each leaf covers a rectangle of
+cells, and leaf probabilities are accumulated in tree order exactly as
+sklearn does, so the table reproduces the model bit for bit rather than
+approximating it.
+"""
+
+import itertools
+import logging
+from typing import Any
+
+import numpy as np
+
+from insuremate.services.compiled_model import CompiledForest
+from insuremate.services.fast_inference import FastPipeline
+
+logger = logging.getLogger("insuremate.lookup_model")
+
+
+class TableTooLarge(Exception):
+    pass
+
+
+class _Leaf:
+    __slots__ = ("value", "conditions", "bounds")
+
+    def __init__(self, value: np.ndarray, conditions: list, bounds: dict):
+        self.value = value
+        # (feature, threshold, go_left) for every categorical split on the path
+        self.conditions = conditions
+        # numeric feature -> (lo, hi): leaf covers lo < x <= hi
+        self.bounds = bounds
+
+
+def _enumerate_leaves(forest: CompiledForest, numeric: set[int]) -> list[_Leaf]:
+    leaves: list[_Leaf] = []
+    for root in forest.roots.tolist():
+        stack = [(root, [], {})]
+        while stack:
+            node, conditions, bounds = stack.pop()
+            left, right = int(forest.left[node]), int(forest.right[node])
+            if left == node and right == node:
+                leaves.append(_Leaf(forest.value[node], conditions, bounds))
+                continue
+            feature = int(forest.feature[node])
+            threshold = float(forest.threshold[node])
+            if feature in numeric:
+                lo, hi = bounds.get(feature, (-np.inf, np.inf))
+                stack.append((left, conditions, {**bounds, feature: (lo, min(hi, threshold))}))
+                stack.append((right, conditions, {**bounds, feature: (max(lo, threshold), hi)}))
+            else:
+                stack.append((left, conditions + [(feature, threshold, True)], bounds))
+                stack.append((right, conditions + [(feature, threshold, False)], bounds))
+    return leaves
+
+
+class LookupTable:
+    """Exact per-category-combination prediction grids for a compiled forest."""
+
+    def __init__(self, engine: FastPipeline, classes: np.ndarray, radices: list[int],
+                 numeric: list[tuple[str, int]], thresholds: list[list[np.ndarray]],
+                 tables: list[np.ndarray]):
+        self.engine = engine
+        self.classes = classes
+        self.radices = radices
+        self.numeric = numeric
+        self.thresholds = thresholds
+        self.tables = tables
+        # Category value -> digit of the combination index, per one-hot block
+        self._codes = [
+            {value: code for code, value in enumerate(block.offsets)} for block in engine.onehot
+        ]
+
+    @classmethod
+    def build(cls, engine: FastPipeline, forest: CompiledForest, max_cells: int) -> "LookupTable":
+        numeric = list(engine.passthrough)
+        leaves = _enumerate_leaves(forest, {index for _, index in numeric})
+        n_trees = len(forest.roots)
+
+        # Each one-hot block contributes one digit; non-strict encoders also
+        # accept unknown values, which encode as all zeros.
+        digits = []
+        for block in engine.onehot:
+            offsets = list(block.offsets.values())
+            digits.append(offsets + ([None] if not block.strict else []))
+        radices = [len(d) for d in digits]
+
+        combos = list(itertools.product(*digits))
+        X = np.zeros((len(combos), engine.n_features))
+        for c, combo in enumerate(combos):
+            X[c, [offset for offset in combo if offset is not None]] = 1.0
+
+        # active[leaf, combo]: the leaf is reachable for that category combination
+        active = np.ones((len(leaves), len(combos)), dtype=bool)
+        for k, leaf in enumerate(leaves):
+            for feature, threshold, go_left in leaf.conditions:
+                active[k] &= (X[:, feature] <= threshold) == go_left
+        # Leaves are enumerated tree by tree, so index order is tree order
+        lo = np.array([[leaf.bounds.get(index, (-np.inf, np.inf))[0] for _, index in numeric]
+                       for leaf in leaves]).reshape(len(leaves), len(numeric))
+        hi = np.array([[leaf.bounds.get(index, (-np.inf, np.inf))[1] for _, index in numeric]
+                       for leaf in leaves]).reshape(len(leaves), len(numeric))
+        leaf_values = np.array([leaf.value for leaf in leaves]).reshape(
+            (len(leaves), len(forest.classes)) + (1,) * len(numeric)
+        )
+
+        thresholds: list[list[np.ndarray]] = []
+        tables: list[np.ndarray] = []
+        total_cells = 0
+        for c in range(len(combos)):
+            rows = np.flatnonzero(active[:, c])
+            axes, starts, stops = [], [], []
+            for d in range(len(numeric)):
+                bounds = np.concatenate([lo[rows, d], hi[rows, d]])
+                axis = np.unique(bounds[np.isfinite(bounds)])
+                axes.append(axis)
+                # A leaf covers cells start..stop-1, where cell i is axis[i-1] < x <= axis[i]
+                starts.append(np.where(np.isfinite(lo[rows, d]),
+                                       np.searchsorted(axis, lo[rows, d], side="right"), 0))
+                stops.append(np.where(np.isfinite(hi[rows, d]),
+                                      np.searchsorted(axis, hi[rows, d], side="right"), len(axis) + 1))
+            shape = tuple(len(axis) + 1 for axis in axes)
+            total_cells += int(np.prod(shape))
+            if total_cells > max_cells:
+                raise TableTooLarge(f"lookup table would exceed {max_cells} cells")
+
+            # Class-major layout keeps each per-leaf add contiguous
+            proba = np.zeros((len(forest.classes),) + shape, dtype=np.float64)
+            for k, row in enumerate(rows.tolist()):
+                region = tuple(slice(starts[d][k], stops[d][k]) for d in range(len(numeric)))
+                proba[(slice(None),) + region] += leaf_values[row]
+            proba /= n_trees
+            tables.append(np.argmax(proba, axis=0).astype(np.min_scalar_type(len(forest.classes))))
+            thresholds.append(axes)
+
+        return cls(engine, forest.classes, radices, numeric, thresholds, tables)
+
+    @property
+    def n_cells(self) -> int:
+        return sum(t.size for t in self.tables)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(t.nbytes for t in self.tables) + sum(
+            a.nbytes for axes in self.thresholds for a in axes
+        )
+
+    def _combo_index(self, values: list) -> int | str:
+        """Mixed-radix index of a category combination, or an error message."""
+        index = 0
+        for block, codes, radix, value in zip(self.engine.onehot, self._codes, self.radices, values):
+            code = codes.get(value)
+            if code is None:
+                if block.strict:
+                    return f"Found unknown category {value!r} in column '{block.column}'"
+                code = radix - 1
+            index = index * radix + code
+        return index
+
+    def _cell(self, combo: int, numerics) -> tuple:
+        # Trees compare float32 inputs; cell i holds thresholds[i-1] < x <= thresholds[i]
+        return tuple(
+            int(np.searchsorted(axis, np.float64(np.float32(v)), side="left"))
+            for axis, v in zip(self.thresholds[combo], numerics)
+        )
+
+    def predict_columns(self, columns: dict[str, np.ndarray]) -> list:
+        """Score feature columns; failing rows yield a ValueError instead of a label."""
+        n = len(next(iter(columns.values())))
+        categorical = [columns[block.column] for block in self.engine.onehot]
+        numerics = [np.asarray(columns[name], dtype=np.float64).astype(np.float32).astype(np.float64)
+                    for name, _ in self.numeric]
+        combos = np.empty(n, dtype=np.int64)
+        outcomes: list[Any] = [None] * n
+        for j in range(n):
+            combo = self._combo_index([values[j] for values in categorical])
+            if isinstance(combo, str):
+                outcomes[j] = ValueError(combo)
+                combos[j] = -1
+            else:
+                combos[j] = combo
+        for combo in np.unique(combos[combos >= 0]).tolist():
+            rows = np.flatnonzero(combos == combo)
+            cells = tuple(
+                np.searchsorted(axis, values[rows], side="left")
+                for axis, values in zip(self.thresholds[combo], numerics)
+            )
+            for j, label in zip(rows.tolist(), self.classes.take(self.tables[combo][cells])):
+                outcomes[j] = label
+        return outcomes
+
+    def predict_row(self, row: dict[str, Any]):
+        combo = self._combo_index([row[block.column] for block in self.engine.onehot])
+        if isinstance(combo, str):
+            raise ValueError(combo)
+        cell = self._cell(combo, [row[name] for name, _ in self.numeric])
+        return self.classes[self.tables[combo][cell]]
@@ -0,0 +1,220 @@
+"""Versioned model loading with background reload and atomic swap.
+
+`ModelRegistry` owns the active `LoadedModel`: the unpickled pipeline plus
+everything derived from it (inference engine, encoder domains). A reload
+reads the artifact once, builds and validates a complete candidate off the
+request path, and only then makes it active with a single reference
+assignment. Callers read that reference once per request, so anything
+already running finishes on the model it started with.
+
+Reloads are triggered by `POST /admin/model/reload` or, with
+MODEL_WATCH_INTERVAL set, by a change to the file at MODEL_PATH.
+"""
+
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from insuremate.core.metrics import Counter, Gauge
+
+logger = logging.getLogger("insuremate.model_registry")
+
+MODEL_RELOADS = Counter(
+    "insuremate_model_reloads_total", "Model reload attempts by outcome", ["outcome"]
+)
+MODEL_INFO = Gauge(
+    "insuremate_model_info", "Model versions loaded by this process (1 = active)", ["version"]
+)
+
+
+def artifact_version(raw: bytes) -> str:
+    """Short content hash identifying a model artifact."""
+    return hashlib.sha256(raw).hexdigest()[:12]
+
+
+class ModelRejected(Exception):
+    """A candidate model failed to load or validate; the active model is kept."""
+
+
+class LoadedModel:
+    """A model and everything derived from it.
+
+    Built completely before it is installed and never modified afterwards.
+    """
+
+    def __init__(self, model: Any, raw: bytes, path: Path, category_domains: dict | None = None,
+                 engine: Any = None):
+        self.model = model
+        self.path = Path(path)
+        self.sha256 = hashlib.sha256(raw).hexdigest()
+        self.version = self.sha256[:12]
+        self.category_domains = category_domains or {}
+        self.engine = engine
+        self.loaded_at = datetime.utcnow()
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": str(self.path),
+            "engine": type(self.engine).__name__ if self.engine is not None else "pandas",
+            "loaded_at": self.loaded_at.isoformat(),
+        }
+
+
+class ModelRegistry:
+    """Holds the active model and replaces it without interrupting requests.
+
+    `prepare(raw, path)` turns artifact bytes into a `LoadedModel`;
+    `validate(candidate, active)` raises `ModelRejected` to refuse a
+    candidate. Hooks added with `on_swap` run as `hook(new, raw)` just
+    before a new model becomes active; if one raises, the swap is abandoned.
+    """
+
+    def __init__(self, path: Path, prepare: Callable[[bytes, Path], LoadedModel],
+                 validate: Callable[[LoadedModel, LoadedModel | None], None] | None = None):
+        self.path = Path(path)
+        self._prepare = prepare
+        self._validate = validate
+        self._hooks: list[Callable[[LoadedModel, bytes], None]] = []
+        self._current: LoadedModel | None = None
+        # Serialises the first load, reloads and installs
+        self._lock = threading.Lock()
+        self._reloader: threading.Thread | None = None
+        self._reloader_lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.last_error: str | None = None
+
+    @property
+    def current(self) -> LoadedModel | None:
+        return self._current
+
+    def on_swap(self, hook: Callable[[LoadedModel, bytes], None]) -> None:
+        self._hooks.append(hook)
+
+    def get(self) -> LoadedModel:
+        """The active model, loading it from `path` on first use."""
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    raw = self.path.read_bytes()
+                    self._swap(self._prepare(raw, self.path), raw)
+                current = self._current
+        return current
+
+    def install(self, loaded: LoadedModel, raw: bytes) -> None:
+        """Make `loaded` active without validating it."""
+        with self._lock:
+            self._swap(loaded, raw)
+
+    def _swap(self, loaded: LoadedModel, raw: bytes) -> None:
+        for hook in self._hooks:
+            hook(loaded, raw)
+        previous, self._current = self._current, loaded
+        if previous is not None and previous.version != loaded.version:
+            MODEL_INFO.set(0, version=previous.version)
+        MODEL_INFO.set(1, version=loaded.version)
+        logger.info("Model %s from %s is active", loaded.version, loaded.path)
+
+    def reload(self, force: bool = False) -> LoadedModel:
+        """Load `path`, validate it and make it active; blocks until done.
+
+        Returns the active model. An artifact identical to the active one is
+        skipped unless `force`. Raises `ModelRejected`, keeping the active
+        model, if the candidate cannot be loaded or fails validation.
+        """
+        with self._lock:
+            try:
+                raw = self.path.read_bytes()
+                if not force and self._current is not None and artifact_version(raw) == self._current.version:
+                    MODEL_RELOADS.inc(outcome="unchanged")
+                    return self._current
+                candidate = self._prepare(raw, self.path)
+                if self._validate is not None:
+                    self._validate(candidate, self._current)
+                self._swap(candidate, raw)
+            except Exception as e:
+                MODEL_RELOADS.inc(outcome="rejected")
+                self.last_error = f"{type(e).__name__}: {e}"
+                if isinstance(e, ModelRejected):
+                    raise
+                raise ModelRejected(f"Could not load {self.path}: {e}") from e
+            MODEL_RELOADS.inc(outcome="swapped")
+            self.last_error = None
+            return candidate
+
+    def _reload_logged(self, force: bool = False) -> None:
+        try:
+            self.reload(force)
+        except ModelRejected as e:
+            logger.error("Model reload rejected; keeping %s: %s",
+                         self._current.version if self._current else "no model", e)
+
+    def reload_in_background(self, force: bool = False) -> bool:
+        """Start `reload` on a background thread. Returns False if one is already running."""
+        with self._reloader_lock:
+            if self._reloader is not None and self._reloader.is_alive():
+                return False
+            self._reloader = threading.Thread(
+                target=self._reload_logged, args=(force,), name="model-reload", daemon=True
+            )
+            self._reloader.start()
+            return True
+
+    @property
+    def reloading(self) -> bool:
+        return self._reloader is not None and self._reloader.is_alive()
+
+    def status(self) -> dict[str, Any]:
+        current = self._current
+        return {
+            "active": current.describe() if current is not None else None,
+            "reloading": self.reloading,
+            "watching": self._watcher is not None,
+            "last_error": self.last_error,
+        }
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def watch(self, interval: float) -> None:
+        """Poll `path` every `interval` seconds and reload once a change has settled."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        # Taken before the thread starts, so a change made right after this
+        # call is not mistaken for the starting state
+        initial = self._stat()
+
+        def run():
+            seen, pending = initial, None
+            while not self._stop.wait(interval):
+                stat = self._stat()
+                if stat is None or stat == seen:
+                    pending = None
+                elif stat != pending:
+                    # Possibly still being written; wait one more interval
+                    pending = stat
+                else:
+                    seen, pending = stat, None
+                    self._reload_logged()
+
+        self._watcher = threading.Thread(target=run, name="model-watcher", daemon=True)
+        self._watcher.start()
+        logger.info("Watching %s for model changes every %.1fs", self.path, interval)
+
+    def stop(self) -> None:
+        """Stop the file watcher and wait for a running reload to finish."""
+        self._stop.set()
+        for thread in (self._watcher, self._reloader):
+            if thread is not None:
+                thread.join()
+        self._watcher = None
@@ -1,14 +1,18 @@
 
 from pathlib import Path
+import asyncio
+import concurrent.futures
+import functools
 import pickle
 import pandas as pd
 import sys
+import threading
 import importlib
 import numpy as np
 from typing import Dict, Any
-from collections import deque
 from datetime import datetime
 import warnings
+import logging
 
 # Add compatibility for missing _RemainderColsList
 import sklearn.compose._column_transformer
@@ -20,12 +24,47 @@ class _RemainderColsList(list):
 # Make the class available in the module
 setattr(sklearn.compose._column_transformer, '_RemainderColsList', _RemainderColsList)
 
-from insuremate.schemas import Userinput
-from insuremate.db.crud import save_prediction_result
-from insuremate.core.config import MODEL_PATH
+from insuremate.schemas import Userinput, TIER_1_CITIES, TIER_2_CITIES, get_city_tier
+from insuremate.db import async_crud
+from insuremate.db.crud import save_prediction_result, save_prediction_results
+from insuremate.core.config import (
+    MODEL_PATH,
+    PREDICT_BATCHING,
+    PREDICT_BATCH_WINDOW_MS,
+    PREDICT_BATCH_MAX_SIZE,
+    PREDICT_BATCH_MAX_QUEUE,
+    PREDICT_BATCH_TIMEOUT,
+    INFERENCE_ENGINE,
+    COMPILED_MODEL_PATH,
+    COMPILED_MAX_ROWS,
+    LOOKUP_MAX_CELLS,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_TTL,
+    PREDICTION_CACHE_POLICY,
+    INFERENCE_PROCESSES,
+    MODEL_HOLDOUT_PATH,
+    MODEL_HOLDOUT_ROWS,
+    MODEL_MAX_ACCURACY_DROP,
+    MODEL_MAX_ERROR_RATE_INCREASE,
+    MODEL_WATCH_INTERVAL,
+    RECENT_PREDICTIONS_DEPTH,
+    RECENT_PREDICTIONS_PATH,
+)
+from insuremate.services.batching import BatcherTimeout, MicroBatcher
+from insuremate.services.inference_pool import InferencePool
+from insuremate.services.fast_inference import FastPipeline, parity_mismatches
+from insuremate.services.compiled_model import CrossoverEstimator, load_or_compile
+from insuremate.services.lookup_model import LookupTable, TableTooLarge
+from insuremate.services.model_registry import LoadedModel, ModelRegistry, ModelRejected
+from insuremate.core.metrics import Gauge, Histogram
+from insuremate.services.cache import TTLCache
+from insuremate.services.recent_log import RecentLog
+from starlette.concurrency import run_in_threadpool
 
-# In-memory recent predictions (simple audit log)
-_RECENT = deque(maxlen=3)
+logger = logging.getLogger("insuremate.predict")
+
+# Recent predictions (simple audit log), optionally shared between workers
+_RECENT = RecentLog(RECENT_PREDICTIONS_DEPTH, RECENT_PREDICTIONS_PATH)
 
 # Prefer the env-driven MODEL_PATH from config, fallback to package/root locations
 _MODEL_PATH = Path(MODEL_PATH)
@@ -37,54 +76,50 @@ if not _MODEL_PATH.exists():
         root_fallback = Path.cwd() / "model.pkl"
         _MODEL_PATH = root_fallback
 
-try:
-    # Provide compatibility shim for older pickles that reference
-    # the historical private module name `numpy._core` (some models
-    # serialized with older numpy versions expect that module).
-    # Map it to the current `numpy.core` module so unpickling succeeds.
+
+def _load_model(raw: bytes, path: Path):
+    """Unpickle the model read from `path`, with shims for pickles from older library versions."""
     try:
-        if 'numpy._core' not in sys.modules:
-            sys.modules['numpy._core'] = getattr(np, 'core', np)
-    except Exception:
-        # If numpy isn't importable here for some reason, let pickle raise
-        # the original error to surface the underlying problem.
-        pass
+        # Provide compatibility shim for older pickles that reference
+        # the historical private module name `numpy._core` (some models
+        # serialized with older numpy versions expect that module).
+        # Map it to the current `numpy.core` module so unpickling succeeds.
+        try:
+            if 'numpy._core' not in sys.modules:
+                sys.modules['numpy._core'] = getattr(np, 'core', np)
+        except Exception:
+            # If numpy isn't importable here for some reason, let pickle raise
+            # the original error to surface the underlying problem.
+            pass
 
-    with open(_MODEL_PATH, "rb") as f:
         # Suppress sklearn unpickle/version warnings only during model load
         with warnings.catch_warnings():
             warnings.simplefilter("ignore", category=Warning)
-            _MODEL = pickle.load(f)
-    print(f"Model loaded successfully from {_MODEL_PATH}")
-except AttributeError as e:
-    print(f"Error loading model: {e}")
-    print("This is likely due to a version mismatch with scikit-learn.")
-    print("Please ensure you're using the same version of scikit-learn that was used to train the model.")
-    raise
+            model = pickle.loads(raw)
+        print(f"Model loaded successfully from {path}")
+        return model
+    except AttributeError as e:
+        print(f"Error loading model: {e}")
+        print("This is likely due to a version mismatch with scikit-learn.")
+        print("Please ensure you're using the same version of scikit-learn that was used to train the model.")
+        raise
 
 
-def predict_from_user(user: Userinput):
-    """Run prediction and persist result to DB.
-    Returns (prediction, db_record, explain_text, warnings)
-    """
-    input_df = pd.DataFrame([{
-        "bmi": user.bmi,
-        "lifestyle_risk": user.lifestyle_risk,
-        "age_group": user.age_group,
-        "city_tier": user.city_tier,
-        "occupation": user.occupation,
-        "income_lpa": user.income_lpa
-    }])
-
-    # Run model
-    prediction = _MODEL.predict(input_df)[0]
-
-    # Generate warnings for unrealistic combos
+# Column order expected by the model pipeline
+FEATURE_COLUMNS = ["bmi", "lifestyle_risk", "age_group", "city_tier", "occupation", "income_lpa"]
+_FEATURE_DTYPES = {"bmi": np.float64, "city_tier": np.int64, "income_lpa": np.float64}
+
+
+def _build_warnings(user: Userinput) -> list[str]:
+    """Flag unrealistic input combinations."""
     warnings: list[str] = []
     if getattr(user, "occupation", None) == "retired" and getattr(user, "age", 0) < 40:
         warnings.append("Occupation is 'retired' but age is under 40 — verify input.")
+    return warnings
+
 
-    # Compose a small explainability text
+def _build_explain_text(user: Userinput, prediction) -> str | None:
+    """Compose a small explainability text for a prediction."""
     reasons: list[str] = []
     try:
         bmi_val = float(user.bmi)
@@ -112,22 +147,646 @@ def predict_from_user(user: Userinput):
         reasons.append("age is 60 or above")
 
     pred_label = str(prediction).capitalize()
-    explain_text = f"{pred_label} premium because " + ", ".join(reasons) if reasons else None
+    return f"{pred_label} premium because " + ", ".join(reasons) if reasons else None
 
-    # Persist to DB
-    db_record = save_prediction_result(user, prediction)
 
-    # Add to in-memory recent log
-    _RECENT.appendleft({
-        "result_id": db_record.id,
-        "predicted_category": prediction,
+def _recent_entry(result_id: int, prediction, explain_text: str | None) -> dict[str, Any]:
+    return {
+        "result_id": result_id,
+        "predicted_category": str(prediction),
         "timestamp": datetime.utcnow().isoformat(),
         "explain_text": explain_text,
-    })
+    }
+
+
+def _remember(result_id: int, prediction, explain_text: str | None) -> None:
+    """Add a prediction to the recent log."""
+    _RECENT.append(_recent_entry(result_id, prediction, explain_text))
+
+
+PREDICT_STAGE_SECONDS = Histogram(
+    "insuremate_predict_stage_seconds", "Time spent in each stage of a prediction request",
+    ["path", "stage"],
+)
+_SINGLE = {stage: PREDICT_STAGE_SECONDS.labels(path="single", stage=stage)
+           for stage in ("features", "inference", "explain", "persist")}
+_BATCH = {stage: PREDICT_STAGE_SECONDS.labels(path="batch", stage=stage)
+          for stage in ("validate", "features", "inference", "explain", "persist")}
+
+
+def predict_from_user(user: Userinput):
+    """Run prediction and persist result to DB.
+    Returns (prediction, db_record, explain_text, warnings)
+    """
+    with _SINGLE["features"].time():
+        row = _features(user)
+    # Run model (through the micro-batcher when enabled)
+    version = model_version()
+    with _SINGLE["inference"].time():
+        prediction = _predict_one(row, version)
+
+    with _SINGLE["explain"].time():
+        warnings = _build_warnings(user)
+        explain_text = _build_explain_text(user, prediction)
+
+    # Persist to DB
+    with _SINGLE["persist"].time():
+        db_record = save_prediction_result(user, prediction, version)
+
+    _remember(db_record.id, prediction, explain_text)
+
+    return prediction, db_record, explain_text, warnings
+
+
+async def predict_from_user_async(user: Userinput):
+    """`predict_from_user` for async routes: no thread is held while waiting
+    on the micro-batcher or (with ASYNC_DB) the database.
+    """
+    with _SINGLE["features"].time():
+        row = _features(user)
+    version = model_version()
+    with _SINGLE["inference"].time():
+        prediction = await _predict_one_async(row, version)
+
+    with _SINGLE["explain"].time():
+        warnings = _build_warnings(user)
+        explain_text = _build_explain_text(user, prediction)
+
+    with _SINGLE["persist"].time():
+        db_record = await async_crud.save_prediction_result(user, prediction, version)
+
+    _remember(db_record.id, prediction, explain_text)
 
     return prediction, db_record, explain_text, warnings
 
 
+def _derive_feature_columns(users: list[Userinput]) -> dict[str, np.ndarray]:
+    """Compute raw and derived columns for a batch of users in one pass.
+
+    Mirrors the computed fields on `Userinput` (bmi, lifestyle_risk,
+    age_group, city_tier) but evaluates them column-wise with NumPy.
+    """
+    n = len(users)
+    age = np.fromiter((u.age for u in users), dtype=np.int64, count=n)
+    weight = np.fromiter((u.weight for u in users), dtype=np.float64, count=n)
+    height = np.fromiter((u.height for u in users), dtype=np.float64, count=n)
+    income_lpa = np.fromiter((u.income_lpa for u in users), dtype=np.float64, count=n)
+    smoker = np.fromiter((u.smoker for u in users), dtype=bool, count=n)
+    city = np.array([u.city for u in users], dtype=object)
+    occupation = np.array([u.occupation for u in users], dtype=object)
+
+    bmi = weight / (height * height)
+    lifestyle_risk = np.select(
+        [smoker & (bmi > 30), smoker & (bmi > 27)], ["high", "medium"], default="low"
+    ).astype(object)
+    age_group = np.select(
+        [age < 25, age < 45, age < 60], ["young", "adult", "middle-aged"], default="senior"
+    ).astype(object)
+    # Resolve each distinct city once and broadcast the tier back to the rows
+    unique_cities, inverse = np.unique(city.astype(str), return_inverse=True)
+    city_tier = np.array([get_city_tier(c) for c in unique_cities], dtype=np.int64)[inverse]
+
+    return {
+        "age": age,
+        "weight": weight,
+        "height": height,
+        "income_lpa": income_lpa,
+        "smoker": smoker,
+        "city": city,
+        "occupation": occupation,
+        "bmi": bmi,
+        "lifestyle_risk": lifestyle_risk,
+        "age_group": age_group,
+        "city_tier": city_tier,
+    }
+
+
+def _category_domains(model) -> dict[str, set]:
+    """Categories accepted by the pipeline's strict one-hot encoders, per column."""
+    domains: dict[str, set] = {}
+    preprocessor = getattr(model, "named_steps", {}).get("preprocessor")
+    for _, transformer, cols in getattr(preprocessor, "transformers_", []):
+        if getattr(transformer, "handle_unknown", None) == "error" and hasattr(transformer, "categories_"):
+            for col, cats in zip(cols, transformer.categories_):
+                domains[col] = set(cats.tolist())
+    return domains
+
+
+def _unknown_category_errors(columns: dict[str, np.ndarray], domains: dict[str, set]) -> dict[int, str]:
+    """Find rows holding categories the model has never seen, keyed by row position."""
+    errors: dict[int, str] = {}
+    for col, allowed in domains.items():
+        if col not in columns:
+            continue
+        values = columns[col]
+        for j in np.flatnonzero(~np.isin(values, list(allowed))):
+            errors.setdefault(int(j), f"Found unknown category {values[j]!r} in column '{col}'")
+    return errors
+
+
+def _predict_frame(model, input_df: pd.DataFrame) -> list:
+    """Score a feature frame, isolating failing rows when the batch call fails.
+
+    Returns one entry per row: the predicted label, or the exception that
+    row raised.
+    """
+    try:
+        return list(model.predict(input_df))
+    except ValueError:
+        if len(input_df) == 1:
+            raise
+    outcomes: list = []
+    for i in range(len(input_df)):
+        try:
+            outcomes.append(model.predict(input_df.iloc[[i]])[0])
+        except ValueError as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def _features(user: Userinput) -> tuple:
+    """Model input row for a user, ordered as FEATURE_COLUMNS."""
+    return (
+        user.bmi,
+        user.lifestyle_risk,
+        user.age_group,
+        user.city_tier,
+        user.occupation,
+        user.income_lpa,
+    )
+
+
+def _score_columns_pandas(columns: dict[str, np.ndarray], loaded: LoadedModel | None = None) -> list:
+    """Score feature columns through the full pipeline via a DataFrame.
+
+    Uses `loaded` (default: the active model). Rows holding unknown
+    categories are rejected up front so they cannot fail the whole batch.
+    Returns one entry per row: the predicted label or the exception raised
+    for that row.
+    """
+    loaded = loaded or _active()
+    n = len(columns[FEATURE_COLUMNS[0]])
+    rejected = _unknown_category_errors(columns, loaded.category_domains)
+    outcomes: list = [ValueError(rejected[j]) if j in rejected else None for j in range(n)]
+    keep = np.array([j not in rejected for j in range(n)], dtype=bool)
+    if keep.any():
+        input_df = pd.DataFrame({name: columns[name][keep] for name in FEATURE_COLUMNS})
+        try:
+            predictions = _predict_frame(loaded.model, input_df)
+        except ValueError as e:
+            predictions = [e]
+        for j, prediction in zip(np.flatnonzero(keep), predictions):
+            outcomes[j] = prediction
+    return outcomes
+
+
+def _score_with(loaded: LoadedModel, columns: dict[str, np.ndarray]) -> list:
+    if loaded.engine is not None:
+        return loaded.engine.predict_columns(columns)
+    return _score_columns_pandas(columns, loaded)
+
+
+def _score_columns_uncached(columns: dict[str, np.ndarray]) -> list:
+    if _POOL is not None:
+        return _POOL.score_columns(columns)
+    return _score_with(_active(), columns)
+
+
+def _score_columns(columns: dict[str, np.ndarray], version: str | None = None) -> list:
+    """Score feature columns with one model call, one outcome per row.
+
+    Rows found in the prediction cache are answered from it; only the
+    remaining rows reach the model. Cache keys include the model version, so
+    an answer from a replaced model is never served.
+    """
+    if _PREDICTION_CACHE.maxsize <= 0:
+        return _score_columns_uncached(columns)
+    version = version or model_version()
+    keys = [(version, *row) for row in zip(*(columns[name].tolist() for name in FEATURE_COLUMNS))]
+    outcomes = [_PREDICTION_CACHE.get(key) for key in keys]
+    missing = [j for j, outcome in enumerate(outcomes) if outcome is None]
+    if missing:
+        subset = {name: columns[name][missing] for name in FEATURE_COLUMNS}
+        for j, outcome in zip(missing, _score_columns_uncached(subset)):
+            outcomes[j] = outcome
+            if not isinstance(outcome, Exception):
+                _PREDICTION_CACHE.set(keys[j], outcome)
+    return outcomes
+
+
+def synthetic_users(n: int, seed: int = 0) -> list[Userinput]:
+    """Generate plausible applicants covering every occupation and city tier."""
+    rng = np.random.default_rng(seed)
+    occupations = list(Userinput.model_fields["occupation"].annotation.__args__)
+    cities = TIER_1_CITIES + TIER_2_CITIES + ["Shimla", "Puducherry"]
+    return [
+        Userinput(
+            age=int(rng.integers(18, 120)),
+            weight=float(rng.uniform(40, 150)),
+            height=float(rng.uniform(1.4, 2.1)),
+            income_lpa=float(rng.uniform(0.5, 100)),
+            smoker=bool(rng.random() < 0.3),
+            city=str(rng.choice(cities)),
+            occupation=str(rng.choice(occupations)),
+        )
+        for _ in range(n)
+    ]
+
+
+LOOKUP_TABLE_BYTES = Gauge(
+    "insuremate_lookup_table_bytes", "Memory held by the prediction lookup table"
+)
+LOOKUP_TABLE_CELLS = Gauge(
+    "insuremate_lookup_table_cells", "Precomputed cells in the prediction lookup table"
+)
+
+
+def _build_engine(loaded: LoadedModel):
+    """Prepare the configured pandas-free engine for `loaded` if it is exact.
+
+    Falls back lookup -> compiled -> fast -> pandas (None) whenever an engine
+    cannot be built or disagrees with the pipeline on a synthetic sample.
+    """
+    if INFERENCE_ENGINE == "pandas":
+        return None
+    engine = FastPipeline.from_pipeline(loaded.model, FEATURE_COLUMNS)
+    if engine is None:
+        logger.warning("Unsupported pipeline structure; using the pandas inference path")
+        return None
+    sample = _derive_feature_columns(synthetic_users(512))
+    reference = functools.partial(_score_columns_pandas, loaded=loaded)
+
+    if INFERENCE_ENGINE in ("compiled", "lookup"):
+        compiled = load_or_compile(engine.estimator, loaded.path, COMPILED_MODEL_PATH, loaded.sha256)
+        if compiled is None:
+            logger.warning("%s cannot be compiled; using the fast inference engine",
+                           type(engine.estimator).__name__)
+        elif INFERENCE_ENGINE == "lookup":
+            try:
+                table = LookupTable.build(engine, compiled, LOOKUP_MAX_CELLS)
+            except TableTooLarge as e:
+                logger.warning("%s; using the fast inference engine", e)
+            else:
+                if parity_mismatches(table, reference, sample):
+                    logger.warning("Lookup table disagreed with the pipeline; using the fast inference engine")
+                else:
+                    LOOKUP_TABLE_BYTES.set(table.nbytes)
+                    LOOKUP_TABLE_CELLS.set(table.n_cells)
+                    logger.info("Using the lookup-table inference engine (%d cells, %.1f KiB)",
+                                table.n_cells, table.nbytes / 1024)
+                    return table
+        elif parity_mismatches(engine.with_estimator(compiled), reference, sample):
+            logger.warning("Compiled model disagreed with the pipeline; using the fast inference engine")
+        else:
+            logger.info("Using the compiled tree inference engine")
+            return engine.with_estimator(
+                CrossoverEstimator(compiled, engine.estimator, COMPILED_MAX_ROWS)
+            )
+
+    mismatches = parity_mismatches(engine, reference, sample)
+    if mismatches:
+        logger.warning(
+            "Fast inference disagreed with the pipeline on %d/%d sample rows; "
+            "using the pandas inference path", len(mismatches), 512,
+        )
+        return None
+    logger.info("Using the pandas-free inference engine")
+    return engine
+
+
+def _prepare_model(raw: bytes, path: Path, model=None) -> LoadedModel:
+    """Unpickle `raw` (unless `model` is given) and build its inference engine."""
+    if model is None:
+        model = _load_model(raw, path)
+    loaded = LoadedModel(model, raw, path, category_domains=_category_domains(model))
+    loaded.engine = _build_engine(loaded)
+    return loaded
+
+
+def _load_holdout() -> tuple[dict[str, np.ndarray], np.ndarray | None]:
+    """Feature columns and (if MODEL_HOLDOUT_PATH has a `label` column) expected labels."""
+    if MODEL_HOLDOUT_PATH is None:
+        return _derive_feature_columns(synthetic_users(MODEL_HOLDOUT_ROWS, seed=7)), None
+    frame = pd.read_csv(MODEL_HOLDOUT_PATH)
+    fields = list(Userinput.model_fields)
+    users = [Userinput(**record) for record in frame[fields].to_dict("records")]
+    labels = frame["label"].astype(str).to_numpy() if "label" in frame else None
+    return _derive_feature_columns(users), labels
+
+
+def _holdout_scores(loaded: LoadedModel, columns, labels) -> tuple[float, float | None, list]:
+    """(error rate, accuracy or None, outcomes) of `loaded` on the holdout."""
+    outcomes = _score_with(loaded, columns)
+    failed = np.array([isinstance(o, Exception) for o in outcomes])
+    accuracy = None
+    if labels is not None:
+        predicted = np.array([None if f else str(o) for o, f in zip(outcomes, failed)], dtype=object)
+        accuracy = float(np.mean(predicted == labels))
+    return float(failed.mean()), accuracy, outcomes
+
+
+def _validate_model(candidate: LoadedModel, active: LoadedModel | None) -> None:
+    """Reject a candidate that scores the holdout worse than the active model.
+
+    Compares the share of rows the model refuses and, when the holdout is
+    labelled, accuracy.
+    """
+    columns, labels = _load_holdout()
+    try:
+        errors, accuracy, outcomes = _holdout_scores(candidate, columns, labels)
+    except Exception as e:
+        raise ModelRejected(f"Model {candidate.version} failed on the holdout sample: {e}") from e
+    if errors >= 1.0:
+        raise ModelRejected(f"Model {candidate.version} rejected every holdout row")
+    if active is None:
+        return
+    active_errors, active_accuracy, active_outcomes = _holdout_scores(active, columns, labels)
+    if errors > active_errors + MODEL_MAX_ERROR_RATE_INCREASE:
+        raise ModelRejected(
+            f"Model {candidate.version} refuses {errors:.1%} of holdout rows "
+            f"(active {active.version}: {active_errors:.1%})"
+        )
+    if accuracy is not None and accuracy < active_accuracy - MODEL_MAX_ACCURACY_DROP:
+        raise ModelRejected(
+            f"Model {candidate.version} holdout accuracy {accuracy:.1%} "
+            f"(active {active.version}: {active_accuracy:.1%})"
+        )
+    agreement = np.mean([str(a) == str(b) for a, b in zip(outcomes, active_outcomes)])
+    logger.info("Model %s validated: error rate %.1f%%, accuracy %s, %.1f%% agreement with %s",
+                candidate.version, errors * 100,
+                "n/a" if accuracy is None else f"{accuracy:.1%}", agreement * 100, active.version)
+
+
+_PREDICTION_CACHE = TTLCache(
+    "predictions",
+    maxsize=PREDICTION_CACHE_SIZE,
+    ttl=PREDICTION_CACHE_TTL,
+    policy=PREDICTION_CACHE_POLICY,
+)
+
+# Loaded on first use rather than at import; the app loads it during startup
+REGISTRY = ModelRegistry(_MODEL_PATH, _prepare_model, _validate_model)
+
+
+def _active() -> LoadedModel:
+    return REGISTRY.current or REGISTRY.get()
+
+
+def get_model():
+    """Return the active model pipeline, loading it from MODEL_PATH on first call."""
+    return _active().model
+
+
+def model_version() -> str:
+    return _active().version
+
+
+def set_model(model) -> None:
+    """Install `model` as the active model, bypassing validation."""
+    raw = pickle.dumps(model)
+    REGISTRY.install(_prepare_model(raw, _MODEL_PATH, model), raw)
+
+
+def _rows_to_columns(rows: list[tuple]) -> dict[str, np.ndarray]:
+    return {
+        name: np.array([row[k] for row in rows], dtype=_FEATURE_DTYPES.get(name, object))
+        for k, name in enumerate(FEATURE_COLUMNS)
+    }
+
+
+def _predict_rows(rows: list[tuple]) -> list:
+    """Score feature rows (ordered as FEATURE_COLUMNS) in one model call.
+
+    Callers have already consulted the prediction cache.
+    """
+    return _score_columns_uncached(_rows_to_columns(rows))
+
+
+# Worker processes for scoring (INFERENCE_PROCESSES > 0); started on first use
+_POOL = InferencePool(INFERENCE_PROCESSES) if INFERENCE_PROCESSES > 0 else None
+
+_BATCHER = (
+    MicroBatcher(
+        # With a process pool, each batch is handed off and the next one collected meanwhile
+        (lambda rows: _POOL.submit(_rows_to_columns(rows))) if _POOL is not None else _predict_rows,
+        window_ms=PREDICT_BATCH_WINDOW_MS,
+        max_batch_size=PREDICT_BATCH_MAX_SIZE,
+        max_queue=PREDICT_BATCH_MAX_QUEUE,
+        max_in_flight=_POOL.processes if _POOL is not None else 1,
+    )
+    if PREDICT_BATCHING
+    else None
+)
+
+
+def _on_model_swap(loaded: LoadedModel, raw: bytes) -> None:
+    if _POOL is not None:
+        # Workers are started on the new artifact before it becomes active
+        _POOL.restart((raw,))
+    # Keys carry the version, so old entries could only take up space
+    _PREDICTION_CACHE.clear()
+
+
+REGISTRY.on_swap(_on_model_swap)
+
+
+def _first_outcome(outcomes: list):
+    if isinstance(outcomes[0], Exception):
+        raise outcomes[0]
+    return outcomes[0]
+
+
+def _predict_unbatched(row: tuple):
+    if _POOL is None:
+        engine = _active().engine
+        if engine is not None:
+            return engine.predict_row(dict(zip(FEATURE_COLUMNS, row)))
+    return _first_outcome(_predict_rows([row]))
+
+
+def _batch_timeout() -> BatcherTimeout:
+    return BatcherTimeout(f"Prediction was not scored within {PREDICT_BATCH_TIMEOUT:g}s, try again shortly")
+
+
+def _predict_one(row: tuple, version: str | None = None):
+    """Score a single feature row, raising if the model rejects it.
+
+    `version` is the model version the caller records with the result.
+    """
+    key = (version or model_version(), *row)
+    prediction = _PREDICTION_CACHE.get(key)
+    if prediction is not None:
+        return prediction
+    if _BATCHER is not None:
+        future = _BATCHER.submit(row)
+        try:
+            prediction = future.result(timeout=PREDICT_BATCH_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise _batch_timeout()
+    else:
+        prediction = _predict_unbatched(row)
+    _PREDICTION_CACHE.set(key, prediction)
+    return prediction
+
+
+async def _predict_one_async(row: tuple, version: str | None = None):
+    """`_predict_one` for the event loop: awaits batcher and process-pool
+    futures instead of blocking on them, and runs in-process model calls in
+    the threadpool.
+    """
+    key = (version or model_version(), *row)
+    prediction = _PREDICTION_CACHE.get(key)
+    if prediction is not None:
+        return prediction
+    if _BATCHER is not None:
+        try:
+            # On timeout wait_for cancels the batcher's future too, unless it is already being scored
+            prediction = await asyncio.wait_for(asyncio.wrap_future(_BATCHER.submit(row)), PREDICT_BATCH_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise _batch_timeout()
+    elif _POOL is not None:
+        prediction = _first_outcome(await asyncio.wrap_future(_POOL.submit(_rows_to_columns([row]))))
+    else:
+        prediction = await run_in_threadpool(_predict_unbatched, row)
+    _PREDICTION_CACHE.set(key, prediction)
+    return prediction
+
+
+def start() -> None:
+    """Start background prediction workers ahead of traffic."""
+    if _POOL is not None:
+        _POOL.start()
+    if MODEL_WATCH_INTERVAL > 0:
+        REGISTRY.watch(MODEL_WATCH_INTERVAL)
+
+
+def warmup(n: int) -> None:
+    """Score `n` synthetic applicants so the first real requests don't pay for
+    lazy initialisation in the model, the engine or the worker processes.
+
+    Bypasses the prediction cache and never writes to the database.
+    """
+    if n <= 0:
+        return
+    columns = _derive_feature_columns(synthetic_users(n, seed=2))
+    _score_columns_uncached(columns)
+    if _POOL is None:
+        # The single-row path has its own code in most engines
+        for row in list(zip(*(columns[name].tolist() for name in FEATURE_COLUMNS)))[:8]:
+            try:
+                _predict_unbatched(row)
+            except ValueError:
+                pass
+    logger.info("Warmed up inference with %d synthetic rows", n)
+
+
+def shutdown() -> None:
+    """Flush and stop background prediction workers."""
+    REGISTRY.stop()
+    if _BATCHER is not None:
+        _BATCHER.stop()
+    if _POOL is not None:
+        _POOL.shutdown()
+
+
+def _score_batch(records: list[dict[str, Any]]):
+    """Validate and score `records`.
+
+    Returns (outcomes, rows, scored): the per-record outcome dicts with errors
+    filled in, the column dicts to persist and (index, user, prediction) for
+    each of those rows.
+    """
+    outcomes: list[dict[str, Any]] = [{"index": i} for i in range(len(records))]
+
+    users: list[Userinput] = []
+    positions: list[int] = []
+    with _BATCH["validate"].time():
+        for i, record in enumerate(records):
+            try:
+                users.append(Userinput(**record))
+                positions.append(i)
+            except (ValueError, TypeError) as e:
+                outcomes[i]["error"] = str(e)
+
+    rows: list[dict[str, Any]] = []
+    scored: list[tuple[int, Userinput, Any]] = []
+    if not users:
+        return outcomes, rows, scored
+
+    with _BATCH["features"].time():
+        columns = _derive_feature_columns(users)
+    version = model_version()
+    with _BATCH["inference"].time():
+        predictions = _score_columns(columns, version)
+
+    for j, (i, user, prediction) in enumerate(zip(positions, users, predictions)):
+        if isinstance(prediction, Exception):
+            outcomes[i]["error"] = str(prediction)
+            continue
+        rows.append({
+            "age": int(columns["age"][j]),
+            "weight": float(columns["weight"][j]),
+            "height": float(columns["height"][j]),
+            "income_lpa": float(columns["income_lpa"][j]),
+            "smoker": bool(columns["smoker"][j]),
+            "city": columns["city"][j],
+            "occupation": columns["occupation"][j],
+            "bmi": float(columns["bmi"][j]),
+            "lifestyle_risk": columns["lifestyle_risk"][j],
+            "age_group": columns["age_group"][j],
+            "city_tier": int(columns["city_tier"][j]),
+            "predicted_category": str(prediction),
+            "model_version": version,
+        })
+        outcomes[i]["model_version"] = version
+        scored.append((i, user, prediction))
+    return outcomes, rows, scored
+
+
+@_BATCH["explain"].time()
+def _finish_batch(outcomes, scored, result_ids) -> list[dict[str, Any]]:
+    recent = []
+    for (i, user, prediction), result_id in zip(scored, result_ids):
+        explain_text = _build_explain_text(user, prediction)
+        outcomes[i].update({
+            "predicted_category": str(prediction),
+            "result_id": result_id,
+            "explain_text": explain_text,
+            "warnings": _build_warnings(user),
+        })
+        recent.append(_recent_entry(result_id, prediction, explain_text))
+    _RECENT.extend(recent)
+    return outcomes
+
+
+def predict_batch(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Validate, score and persist a batch of raw user records.
+
+    All valid records are scored with a single model call and stored with a
+    single bulk insert. Returns one entry per input record, in order, holding
+    either the prediction payload or an `error` message.
+    """
+    outcomes, rows, scored = _score_batch(records)
+    if not rows:
+        return outcomes
+    with _BATCH["persist"].time():
+        result_ids = save_prediction_results(rows)
+    return _finish_batch(outcomes, scored, result_ids)
+
+
+async def predict_batch_async(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """`predict_batch` for async routes: scoring runs in the threadpool and the
+    bulk insert goes through `async_crud`.
+    """
+    outcomes, rows, scored = await run_in_threadpool(_score_batch, records)
+    if not rows:
+        return outcomes
+    with _BATCH["persist"].time():
+        result_ids = await async_crud.save_prediction_results(rows)
+    return _finish_batch(outcomes, scored, result_ids)
+
+
 def get_recent_predictions():
-    """Return the last few predictions kept in-memory (simple audit log)."""
-    return list(_RECENT)
+    """Return the last few predictions, newest first (simple audit log)."""
+    return _RECENT.latest()
@@ -0,0 +1,142 @@
+"""Fixed-size log of the most recent predictions.
+
+Without a path the log is held by this process. With a path (configured by
+RECENT_PREDICTIONS_PATH) it is a small memory-mapped file that every server
+worker on the host opens, so `/results/recent` returns the same entries
+whichever worker answers, without a database query.
+
+The file is a header followed by `depth` fixed-size slots used as a ring:
+an append writes one slot and advances the head counter, a read walks back
+from the head. Both take an `flock` on the file, so readers never see a
+half-written slot.
+
+Workers may still have the file mapped while others start up (say during a
+rolling deploy), so an existing file is never resized or rewritten. The
+depth and slot size are part of the file name (`<path>.<depth>x<slot size>`),
+and workers configured differently each get their own file.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+_MAGIC = b"IMRL"
+# magic, depth, slot size, entries appended so far
+_HEADER = struct.Struct("<4sIIQ")
+# JSON payload length at the start of each slot
+_LENGTH = struct.Struct("<I")
+
+
+class RecentLog:
+    """Ring buffer of the last `depth` JSON-serialisable entries, newest first."""
+
+    def __init__(self, depth: int, path: Path | str | None = None, slot_size: int = 512):
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.depth = depth
+        self.slot_size = slot_size
+        self.path = Path(f"{path}.{depth}x{slot_size}") if path else None
+        # Serialises threads of this process; the flock serialises processes
+        self._lock = threading.Lock()
+        self._mmap: mmap.mmap | None = None
+        self._slots: list[Any] = [None] * depth
+        self._head = 0
+        if self.path is not None:
+            self._open()
+
+    def _open(self) -> None:
+        import fcntl
+
+        size = _HEADER.size + self.depth * self.slot_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            existing = os.fstat(self._fd).st_size
+            if existing == 0:
+                # New file: nobody can have it mapped yet
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, self.depth, self.slot_size, 0), 0)
+            usable = existing in (0, size) and (
+                existing == 0
+                or _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))[:3] == (_MAGIC, self.depth, self.slot_size)
+            )
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        if not usable:
+            os.close(self._fd)
+            raise RuntimeError(
+                f"{self.path} is not a recent-predictions log of depth {self.depth} with "
+                f"{self.slot_size}-byte slots; remove it or point RECENT_PREDICTIONS_PATH elsewhere"
+            )
+        self._mmap = mmap.mmap(self._fd, size)
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._lock:
+            if self._mmap is None:
+                yield
+                return
+            import fcntl
+
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _slot_offset(self, index: int) -> int:
+        return _HEADER.size + (index % self.depth) * self.slot_size
+
+    def append(self, entry: dict[str, Any]) -> None:
+        self.extend([entry])
+
+    def extend(self, entries: list[dict[str, Any]]) -> None:
+        """Append `entries` in order, taking the lock once."""
+        if self.path is None:
+            with self._locked(exclusive=True):
+                for entry in entries:
+                    self._slots[self._head % self.depth] = entry
+                    self._head += 1
+            return
+        payloads = [json.dumps(entry, separators=(",", ":")).encode() for entry in entries]
+        for payload in payloads:
+            if _LENGTH.size + len(payload) > self.slot_size:
+                raise ValueError(f"Entry of {len(payload)} bytes does not fit a {self.slot_size}-byte slot")
+        with self._locked(exclusive=True):
+            # Entries that would be overwritten within this call are skipped
+            skip = max(0, len(payloads) - self.depth)
+            head = _HEADER.unpack_from(self._mmap, 0)[3] + skip
+            for payload in payloads[skip:]:
+                offset = self._slot_offset(head)
+                _LENGTH.pack_into(self._mmap, offset, len(payload))
+                self._mmap[offset + _LENGTH.size:offset + _LENGTH.size + len(payload)] = payload
+                head += 1
+            _HEADER.pack_into(self._mmap, 0, _MAGIC, self.depth, self.slot_size, head)
+
+    def latest(self, n: int | None = None) -> list[dict[str, Any]]:
+        """Up to `n` (default `depth`) entries, newest first."""
+        n = self.depth if n is None else min(n, self.depth)
+        with self._locked(exclusive=False):
+            if self.path is None:
+                head = self._head
+                return [self._slots[(head - 1 - i) % self.depth] for i in range(min(n, head))]
+            head = _HEADER.unpack_from(self._mmap, 0)[3]
+            entries = []
+            for i in range(min(n, head)):
+                offset = self._slot_offset(head - 1 - i)
+                (length,) = _LENGTH.unpack_from(self._mmap, offset)
+                entries.append(json.loads(self._mmap[offset + _LENGTH.size:offset + _LENGTH.size + length]))
+            return entries
+
+    def clear(self) -> None:
+        with self._locked(exclusive=True):
+            self._slots = [None] * self.depth
+            self._head = 0
+            if self._mmap is not None:
+                _HEADER.pack_into(self._mmap, 0, _MAGIC, self.depth, self.slot_size, 0)
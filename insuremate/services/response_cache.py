@@ -0,0 +1,82 @@
+"""Encoded responses cached against the version of the data they were built from.
+
+`/results` listings are pure functions of `prediction_results`, so an
+encoded body stays valid until a result is inserted. `ResultsVersion`
+combines this process's write counter (changes immediately on a local
+insert) with a database token that is re-read at most every `ttl` seconds
+(picks up inserts made by other workers). `ResponseCache` stores each body
+with that version and its ETag; an entry built from an older version is
+treated as a miss.
+"""
+
+import hashlib
+import time
+from typing import Awaitable, Callable, Hashable, NamedTuple
+
+from insuremate.db.changes import local_writes
+from insuremate.services.cache import TTLCache
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag derived from the body, so every worker agrees on it."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an `If-None-Match` header value covers `etag`."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # Weak comparison, as RFC 9110 prescribes for If-None-Match
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResultsVersion:
+    """Changes whenever `prediction_results` may have changed."""
+
+    def __init__(self, read_token: Callable[[], Awaitable[Hashable]], ttl: float):
+        self._read_token = read_token
+        self.ttl = ttl
+        self._token: Hashable = None
+        self._checked = float("-inf")
+
+    async def get(self) -> tuple:
+        writes = local_writes()
+        if time.monotonic() - self._checked >= self.ttl:
+            checked = time.monotonic()
+            self._token = await self._read_token()
+            self._checked = checked
+        return writes, self._token
+
+
+class CachedResponse(NamedTuple):
+    version: tuple
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    """Bounded cache of encoded bodies keyed by request parameters."""
+
+    def __init__(self, name: str, maxsize: int, max_body_bytes: int):
+        self.max_body_bytes = max_body_bytes
+        self._cache = TTLCache(name, maxsize)
+
+    def get(self, key: Hashable, version: tuple) -> CachedResponse | None:
+        cached = self._cache.get(key)
+        if cached is None or cached.version != version:
+            return None
+        return cached
+
+    def put(self, key: Hashable, version: tuple, body: bytes) -> CachedResponse:
+        """Wrap `body` with its ETag, caching it unless it is too large."""
+        response = CachedResponse(version, etag_for(body), body)
+        if len(body) <= self.max_body_bytes:
+            self._cache.set(key, response)
+        return response
+
+    def clear(self) -> None:
+        self._cache.clear()
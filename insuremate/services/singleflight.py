@@ -0,0 +1,60 @@
+"""Coalescing of identical concurrent calls ("single flight").
+
+The first caller for a key starts the call; anyone asking for the same key
+while it is still running awaits that call instead of starting another,
+and every caller gets the same result object (or exception). Nothing is
+cached: once the call finishes, the next request for the key runs it again.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from insuremate.core.metrics import Counter
+
+SINGLEFLIGHT_CALLS = Counter(
+    "insuremate_singleflight_calls_total",
+    "Coalesced calls by whether they ran (leader) or joined one in flight (coalesced)",
+    ["group", "outcome"],
+)
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # Every awaiter may have been cancelled; don't log the error as unretrieved
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Shares one in-flight call among concurrent callers with the same key.
+
+    The call runs as its own task, so a caller that is cancelled (say, the
+    client disconnected) does not cancel it for the others. Results are
+    shared, so callers must not mutate them.
+    """
+
+    def __init__(self, group: str, enabled: bool = True):
+        self.group = group
+        self.enabled = enabled
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await call()
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is loop:
+            SINGLEFLIGHT_CALLS.inc(group=self.group, outcome="coalesced")
+        else:
+            SINGLEFLIGHT_CALLS.inc(group=self.group, outcome="leader")
+            task = loop.create_task(call())
+            self._inflight[key] = task
+            task.add_done_callback(_consume_exception)
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._inflight)
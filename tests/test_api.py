@@ -1,16 +1,31 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from insuremate.api.health import router as health_router
 from insuremate.main import app
 
-client = TestClient(app)
+@pytest.fixture(scope="module")
+def client():
+    # Entering the client runs the lifespan: tables, model load and warmup
+    with TestClient(app) as c:
+        yield c
 
 
-def test_root_predict_not_implemented():
+def test_root_predict_not_implemented(client):
     # verify predict endpoint exists and returns 422 with empty payload
     resp = client.post("/predict", json={})
     assert resp.status_code in (200, 422)
 
 
-def test_results_endpoints():
+def test_results_endpoints(client):
     resp = client.get("/results")
     assert resp.status_code == 200
     assert isinstance(resp.json(), dict)
@@ -20,3 +35,207 @@ def test_results_endpoints():
 
     resp3 = client.get("/results/category/test-category")
     assert resp3.status_code == 200
+
+
+def test_predict_batch_reports_per_row_outcomes(client):
+    record = {
+        "age": 30, "weight": 70, "height": 1.75, "income_lpa": 12,
+        "smoker": False, "city": "Pune", "occupation": "private_job",
+    }
+    resp = client.post("/predict/batch", json=[record, {**record, "age": 10}, record])
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total"] == 3
+    assert body["failed"] == 1
+    first, bad, last = body["results"]
+    assert "error" in bad
+    assert first["predicted_category"] == last["predicted_category"]
+    assert last["result_id"] > first["result_id"]
+
+
+def test_results_keyset_pagination_and_ndjson_stream(client):
+    # The test database persists between runs, so use a city nobody else has
+    city = f"Pagination-{uuid.uuid4().hex[:8]}"
+    record = {
+        "age": 30, "weight": 70, "height": 1.75, "income_lpa": 12,
+        "smoker": False, "city": city, "occupation": "student",
+    }
+    client.post("/predict/batch", json=[record] * 3)
+
+    first = client.get(f"/results/city/{city}", params={"limit": 2}).json()
+    assert first["city"] == city
+    assert len(first["results"]) == 2 and first["next_cursor"] is not None
+    rest = client.get(f"/results/city/{city}", params={"limit": 2, "after": first["next_cursor"]}).json()
+    assert rest["next_cursor"] is None
+    paged = [r["id"] for r in first["results"] + rest["results"]]
+    assert len(paged) == 3 and paged == sorted(set(paged))
+    assert client.get("/results", params={"after": "not-a-cursor"}).status_code == 400
+
+    streamed = client.get(f"/results/city/{city}", params={"format": "ndjson"})
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in streamed.text.splitlines()] == paged
+
+
+def test_results_export_csv_and_parquet(client):
+    city = f"Export-{uuid.uuid4().hex[:8]}"
+    record = {
+        "age": 30, "weight": 70, "height": 1.75, "income_lpa": 12,
+        "smoker": False, "city": city, "occupation": "student",
+    }
+    client.post("/predict/batch", json=[record] * 3)
+
+    resp = client.get("/results/export", params={"city": city})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/gzip"
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(resp.content).decode())))
+    assert len(rows) == 3 and {r["city"] for r in rows} == {city}
+
+    future = client.get("/results/export", params={"city": city, "since": "2999-01-01T00:00:00"})
+    assert gzip.decompress(future.content).decode().count("\n") == 1  # header only
+
+    pq = pytest.importorskip("pyarrow.parquet")
+    resp = client.get("/results/export", params={"city": city, "format": "parquet"})
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert table.num_rows == 3 and table.column("city").to_pylist() == [city] * 3
+
+
+def test_results_stats_reads_incremental_rollups(client):
+    before = client.get("/results/stats", params={"group_by": "category"}).json()
+    record = {
+        "age": 30, "weight": 70, "height": 1.75, "income_lpa": 12,
+        "smoker": False, "city": "Stats-city", "occupation": "student",
+    }
+    client.post("/predict/batch", json=[record] * 2)
+    client.post("/predict", json=record)
+
+    after = client.get("/results/stats", params={"group_by": "category"}).json()
+    assert after["total_predictions"] == before["total_predictions"] + 3
+    assert set(after["breakdown"][0]) == {"category", "count", "average_bmi"}
+    assert sum(g["count"] for g in after["breakdown"]) == after["total_predictions"]
+
+    today = client.get("/results/stats", params={"since": str(datetime.utcnow().date())}).json()
+    assert {"day", "category", "city_tier"} <= set(today["breakdown"][0])
+
+
+def test_ready_only_after_startup(client):
+    assert client.get("/ready").json() == {"status": "ready"}
+    # An app whose lifespan never ran is alive but not ready
+    bare = FastAPI()
+    bare.include_router(health_router)
+    assert TestClient(bare).get("/ready").status_code == 503
+
+
+def test_admin_routes_refused_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr("insuremate.api.admin.ADMIN_TOKEN", "")
+    assert client.post("/admin/model/reload", params={"force": True}).status_code == 403
+    monkeypatch.setattr("insuremate.api.admin.ADMIN_TOKEN", "secret")
+    assert client.post("/admin/model/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_model_reload_and_version_recorded(client, monkeypatch):
+    monkeypatch.setattr("insuremate.api.admin.ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    resp = client.post("/admin/model/reload", params={"wait": True, "force": True}, headers=admin)
+    assert resp.status_code == 200
+    version = resp.json()["active"]["version"]
+    assert client.get("/admin/model", headers=admin).json()["active"]["version"] == version
+
+    city = f"Version-{uuid.uuid4().hex[:8]}"
+    record = {
+        "age": 30, "weight": 70, "height": 1.75, "income_lpa": 12,
+        "smoker": False, "city": city, "occupation": "student",
+    }
+    assert client.post("/predict", json=record).json()["model_version"] == version
+    rows = client.get(f"/results/city/{city}").json()["results"]
+    assert [r["model_version"] for r in rows] == [version]
+
+
+def test_metrics_expose_request_and_stage_timings(client):
+    record = {
+        "age": 30, "weight": 70, "height": 1.75, "income_lpa": 12,
+        "smoker": False, "city": "Pune", "occupation": "student",
+    }
+    client.post("/predict", json=record)
+    client.get("/results/city/Pune", params={"limit": 1})
+    text = client.get("/metrics").text
+    assert 'insuremate_http_requests_total{method="POST",route="/predict",status="200"}' in text
+    assert 'insuremate_http_requests_total{method="GET",route="/results/city/{city}",status="200"}' in text
+    for stage in ("features", "inference", "explain", "persist"):
+        assert f'insuremate_predict_stage_seconds_count{{path="single",stage="{stage}"}}' in text
+    assert "insuremate_input_validation_seconds_count" in text
+    assert 'insuremate_db_operation_seconds_count{operation="insert_result"}' in text
+    assert 'insuremate_db_rows_read_total{operation="query_page_rows"}' in text
+
+
+def test_results_listing_payload_matches_schema(client):
+    from insuremate.schemas import PredictionResultSchema
+
+    city = f"schema-{uuid.uuid4().hex}"
+    record = {"age": 30, "weight": 70, "height": 1.75, "income_lpa": 12,
+              "smoker": False, "city": city, "occupation": "private_job"}
+    client.post("/predict", json=record)
+    for params in ({}, {"limit": 5}):
+        body = client.get(f"/results/city/{city}", params=params).json()
+        (row,) = body["results"]
+        assert set(row) == set(PredictionResultSchema.model_fields)
+        assert datetime.fromisoformat(row["created_at"])
+        assert row["city_tier"] == 3 and row["model_version"]
+
+
+def test_results_etag_cache_and_invalidation(client):
+    from insuremate.db.crud import DB_SECONDS
+
+    city = f"etag-{uuid.uuid4().hex}"
+    record = {"age": 30, "weight": 70, "height": 1.75, "income_lpa": 12,
+              "smoker": False, "city": city, "occupation": "private_job"}
+    client.post("/predict", json=record)
+    first = client.get(f"/results/city/{city}")
+    etag = first.headers["etag"]
+    queries = DB_SECONDS.get(operation="query_rows")
+
+    again = client.get(f"/results/city/{city}", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["etag"] == etag and not again.content
+    assert client.get(f"/results/city/{city}").json() == first.json()
+    assert DB_SECONDS.get(operation="query_rows") == queries
+
+    client.post("/predict", json=record)
+    changed = client.get(f"/results/city/{city}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert changed.json()["total_results"] == 2
+
+
+def test_predict_idempotency_key_replays_without_a_new_row(client):
+    city = f"idem-{uuid.uuid4().hex}"
+    record = {"age": 30, "weight": 70, "height": 1.75, "income_lpa": 12,
+              "smoker": False, "city": city, "occupation": "private_job"}
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+    first = client.post("/predict", json=record, headers=headers)
+    retry = client.post("/predict", json=record, headers=headers)
+    assert retry.status_code == 200 and retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert client.get(f"/results/city/{city}").json()["total_results"] == 1
+
+    reused = client.post("/predict", json={**record, "age": 31}, headers=headers)
+    assert reused.status_code == 422
+
+
+def test_startup_adds_columns_missing_from_an_existing_table(tmp_path):
+    from sqlalchemy import create_engine, inspect, text
+
+    from insuremate.main import _add_missing_columns
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # prediction_results as created before model_version existed
+        conn.execute(text(
+            "CREATE TABLE prediction_results (id INTEGER PRIMARY KEY, age INTEGER NOT NULL, "
+            "weight FLOAT NOT NULL, height FLOAT NOT NULL, income_lpa FLOAT NOT NULL, "
+            "smoker BOOLEAN NOT NULL, city VARCHAR NOT NULL, occupation VARCHAR NOT NULL, "
+            "bmi FLOAT NOT NULL, lifestyle_risk VARCHAR NOT NULL, age_group VARCHAR NOT NULL, "
+            "city_tier INTEGER NOT NULL, predicted_category VARCHAR NOT NULL, created_at DATETIME)"
+        ))
+    _add_missing_columns(engine)
+    _add_missing_columns(engine)  # a second worker finds nothing to do
+    columns = {column["name"] for column in inspect(engine).get_columns("prediction_results")}
+    assert "model_version" in columns
+    engine.dispose()
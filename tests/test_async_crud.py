@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from insuremate.db import async_crud
+from insuremate.db import session as db_session
+from insuremate.db.base import Base
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def async_db(tmp_path, monkeypatch):
+    path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    engine = create_async_engine(db_session.get_async_database_url(f"sqlite:///{path}"))
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def _row(i):
+    return dict(
+        age=30, weight=70.0, height=1.75, income_lpa=10.0 + i, smoker=False,
+        city=("Pune", "Delhi")[i % 2], occupation="student", bmi=22.9, lifestyle_risk="low",
+        age_group="adult", city_tier=1, predicted_category="Low",
+        created_at=datetime(2026, 5, 1, 12, i),
+    )
+
+
+def test_async_crud_round_trip(async_db):
+    async def scenario():
+        ids = await async_crud.save_prediction_results([_row(i) for i in range(5)])
+        first = await async_crud.get_results_page(limit=2, city="Pune")
+        rest = await async_crud.get_results_page(
+            limit=2, after=(first[-1].created_at, first[-1].id), city="Pune"
+        )
+        stats = await async_crud.get_statistics()
+        return ids, first + rest, stats
+
+    ids, pune, stats = asyncio.run(scenario())
+    assert len(ids) == 5
+    assert [r.id for r in pune] == [ids[0], ids[2], ids[4]]
+    assert stats["total_predictions"] == 5
+
+
+def test_async_database_url_swaps_in_async_drivers():
+    assert db_session.get_async_database_url("sqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+    assert db_session.get_async_database_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
@@ -0,0 +1,38 @@
+import time
+
+from insuremate.services import predict
+from insuremate.services.cache import CACHE_ENTRIES, CACHE_EVICTIONS, TTLCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = TTLCache("test-lru", maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert CACHE_EVICTIONS.get(cache="test-lru", reason="size") == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache("test-ttl", maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert CACHE_ENTRIES.get(cache="test-ttl") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert CACHE_ENTRIES.get(cache="test-ttl") == 0
+
+
+def test_prediction_cache_is_cleared_when_model_changes():
+    user = predict.synthetic_users(1, seed=3)[0]
+    if user.age_group == "middle-aged":
+        user = user.model_copy(update={"age": 30})
+    row = predict._features(user)
+    first = predict._predict_one(row)
+    assert predict._PREDICTION_CACHE.get((predict.model_version(), *row)) == first
+
+    predict.set_model(predict.get_model())
+    assert predict._PREDICTION_CACHE.get((predict.model_version(), *row)) is None
+    assert predict._predict_one(row) == first
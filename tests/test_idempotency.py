@@ -0,0 +1,77 @@
+import asyncio
+import itertools
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from insuremate.db import session as db_session
+from insuremate.db.base import Base
+from insuremate.services.idempotency import IdempotencyInProgress, IdempotencyKeyReused, IdempotencyStore
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'idempotency.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(db_session, "SessionLocal", sessionmaker(bind=engine))
+    yield engine
+    engine.dispose()
+
+
+def _counting_call():
+    ids = itertools.count(1)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return {"result_id": next(ids)}
+
+    return call, calls
+
+
+def test_concurrent_duplicates_run_once_and_replay():
+    store = IdempotencyStore(ttl=60, maxsize=10)
+    call, calls = _counting_call()
+
+    async def main():
+        first = await asyncio.gather(*(store.run("k", "fp", call) for _ in range(3)))
+        assert [replayed for _, replayed in first].count(False) == 1
+        assert await store.run("k", "fp", call) == ({"result_id": 1}, True)
+        with pytest.raises(IdempotencyKeyReused):
+            await store.run("k", "other", call)
+
+    asyncio.run(main())
+    assert len(calls) == 1
+
+
+def test_shared_table_replays_across_workers_and_releases_failures(temp_db):
+    # Two stores on one table stand in for two server workers
+    worker_a = IdempotencyStore(ttl=60, maxsize=10, shared=True, poll_interval=0.005)
+    worker_b = IdempotencyStore(ttl=60, maxsize=10, shared=True, poll_interval=0.005)
+    call, calls = _counting_call()
+
+    async def failing():
+        raise RuntimeError("inference failed")
+
+    async def main():
+        (a, a_replayed), (b, b_replayed) = await asyncio.gather(
+            worker_a.run("k", "fp", call), worker_b.run("k", "fp", call)
+        )
+        assert a == b == {"result_id": 1} and {a_replayed, b_replayed} == {False, True}
+
+        with pytest.raises(RuntimeError):
+            await worker_a.run("retry", "fp", failing)
+        assert await worker_b.run("retry", "fp", call) == ({"result_id": 2}, False)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_shared_claim_held_too_long_is_reported(temp_db):
+    store = IdempotencyStore(ttl=60, maxsize=10, shared=True, wait_timeout=0.05, poll_interval=0.01)
+    assert store._try_claim("k", "fp") is None
+
+    with pytest.raises(IdempotencyInProgress):
+        asyncio.run(store.run("k", "fp", _counting_call()[0]))
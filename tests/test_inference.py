@@ -0,0 +1,67 @@
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from insuremate.services import predict
+from insuremate.services.compiled_model import CompiledForest, CrossoverEstimator
+from insuremate.services.fast_inference import FastPipeline, parity_mismatches
+from insuremate.services.inference_pool import InferencePool
+from insuremate.services.lookup_model import LookupTable, TableTooLarge
+
+
+def _sample(n=300, seed=7):
+    return predict._derive_feature_columns(predict.synthetic_users(n, seed=seed))
+
+
+def test_fast_pipeline_matches_pandas_path():
+    engine = FastPipeline.from_pipeline(predict.get_model(), predict.FEATURE_COLUMNS)
+    assert engine is not None
+    assert parity_mismatches(engine, predict._score_columns_pandas, _sample()) == []
+
+
+def test_fast_pipeline_rejects_unknown_categories():
+    engine = FastPipeline.from_pipeline(predict.get_model(), predict.FEATURE_COLUMNS)
+    row = dict(zip(predict.FEATURE_COLUMNS, (22.0, "low", "not-a-group", 1, "student", 10.0)))
+    with pytest.raises(ValueError, match="not-a-group"):
+        engine.predict_row(row)
+
+
+def test_unsupported_pipeline_falls_back():
+    model = Pipeline([("scale", StandardScaler()), ("classifier", predict.get_model().steps[-1][1])])
+    assert FastPipeline.from_pipeline(model, predict.FEATURE_COLUMNS) is None
+
+
+def test_compiled_forest_matches_estimator_after_round_trip(tmp_path):
+    engine = FastPipeline.from_pipeline(predict.get_model(), predict.FEATURE_COLUMNS)
+    compiled = CompiledForest.from_estimator(engine.estimator)
+    path = tmp_path / "model.compiled.npz"
+    compiled.save(path)
+    loaded = CompiledForest.load(path)
+
+    X, errors = engine.encode(_sample(n=1500, seed=11))
+    X = X[[j for j in range(len(X)) if j not in errors]]
+    expected = engine.estimator.predict(X)
+    assert (loaded.predict(X) == expected).all()
+    assert (CrossoverEstimator(loaded, engine.estimator, max_rows=100).predict(X) == expected).all()
+
+
+def test_lookup_table_is_exact_and_bounded():
+    engine = FastPipeline.from_pipeline(predict.get_model(), predict.FEATURE_COLUMNS)
+    compiled = CompiledForest.from_estimator(engine.estimator)
+    table = LookupTable.build(engine, compiled, max_cells=5_000_000)
+    assert table.nbytes > 0
+    assert parity_mismatches(table, predict._score_columns_pandas, _sample(n=2000, seed=13)) == []
+
+    with pytest.raises(TableTooLarge):
+        LookupTable.build(engine, compiled, max_cells=1000)
+
+
+def test_inference_pool_matches_in_process_scoring():
+    pool = InferencePool(processes=2, min_chunk_rows=64)
+    try:
+        columns = predict._derive_feature_columns(predict.synthetic_users(300, seed=5))
+        in_process = predict._score_columns_uncached(columns)
+        pooled = pool.score_columns(columns)
+        assert [str(o) for o in pooled] == [str(o) for o in in_process]
+    finally:
+        pool.shutdown()
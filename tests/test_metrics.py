@@ -0,0 +1,47 @@
+import json
+
+from insuremate.core import metrics
+from insuremate.core.metrics import Counter, Gauge, Histogram, Registry, render_latest
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = Histogram("test_latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, stage="model")
+    with latency.time(stage="model"):
+        pass
+
+    lines = render_latest(registry).splitlines()
+    assert 'test_latency_seconds_bucket{stage="model",le="0.1"} 2.0' in lines
+    assert 'test_latency_seconds_bucket{stage="model",le="1.0"} 4.0' in lines
+    assert 'test_latency_seconds_bucket{stage="model",le="+Inf"} 5.0' in lines
+    assert 'test_latency_seconds_count{stage="model"} 5.0' in lines
+    assert latency.get_sum(stage="model") >= 4.05
+
+
+def test_multiprocess_merges_other_workers(tmp_path):
+    registry = Registry()
+    requests = Counter("test_mp_requests_total", "Requests", ["route"], registry=registry)
+    latency = Histogram("test_mp_seconds", "Latency", buckets=(1.0,), registry=registry)
+    in_use = Gauge("test_mp_in_use", "In use", registry=registry)
+    requests.inc(2, route="/predict")
+    latency.observe(0.5)
+    in_use.set(3)
+    # What another worker process would have written
+    (tmp_path / "99999.json").write_text(json.dumps({
+        "test_mp_requests_total": [[["/predict"], 5.0]],
+        "test_mp_seconds": [[[], [[1, 1], 2.5]]],
+        "test_mp_in_use": [[[], 4.0]],
+    }))
+
+    metrics.start_multiprocess(tmp_path, interval=60, registry=registry)
+    try:
+        lines = render_latest(registry).splitlines()
+    finally:
+        metrics.stop_multiprocess()
+    assert 'test_mp_requests_total{route="/predict"} 7.0' in lines
+    assert 'test_mp_seconds_bucket{le="+Inf"} 3.0' in lines
+    assert 'test_mp_seconds_sum 3.0' in lines
+    assert 'test_mp_in_use{pid="99999"} 4.0' in lines
+    assert any(line.startswith('test_mp_in_use{pid="') and line.endswith(" 3.0") for line in lines)
@@ -0,0 +1,47 @@
+import pickle
+import time
+
+import pytest
+
+from insuremate.services import predict
+from insuremate.services.model_registry import ModelRegistry, ModelRejected
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(predict._MODEL_PATH.read_bytes())
+    registry = ModelRegistry(path, predict._prepare_model, predict._validate_model)
+    yield registry
+    registry.stop()
+
+
+def test_reload_validates_and_swaps_atomically(registry):
+    swapped = []
+    registry.on_swap(lambda loaded, raw: swapped.append(loaded.version))
+    first = registry.get()
+    assert registry.reload() is first
+
+    # Same model, different bytes: a new version that passes validation
+    registry.path.write_bytes(pickle.dumps(first.model, protocol=4))
+    second = registry.reload()
+    assert second.version != first.version and registry.current is second
+    assert swapped == [first.version, second.version]
+    # Whoever still holds the old model can finish with it
+    assert first.model is not None and first.engine is not None
+
+    registry.path.write_bytes(b"not a pickle")
+    with pytest.raises(ModelRejected):
+        registry.reload()
+    assert registry.current is second
+    assert registry.status()["last_error"]
+
+
+def test_watcher_reloads_changed_artifact(registry):
+    first = registry.get()
+    registry.watch(0.05)
+    registry.path.write_bytes(pickle.dumps(first.model, protocol=4))
+    deadline = time.monotonic() + 10
+    while registry.current is first and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert registry.current is not first
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from insuremate.db.pool import (
+    POOL_CHECKOUTS,
+    POOL_SATURATION,
+    POOL_TIMEOUTS,
+    InstrumentedQueuePool,
+    configure_engine,
+)
+
+
+@pytest.fixture
+def tiny_pool(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    configure_engine(engine, "test")
+    yield engine
+    engine.dispose()
+
+
+def test_sqlite_connections_use_wal_and_busy_timeout(tiny_pool):
+    with tiny_pool.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+
+
+def test_pool_saturation_and_checkout_timeouts_are_exported(tiny_pool):
+    timeouts = POOL_TIMEOUTS.get(pool="test")
+    with tiny_pool.connect():
+        assert POOL_SATURATION.get(pool="test") == 1.0
+        with pytest.raises(PoolTimeout):
+            tiny_pool.connect()
+    assert POOL_TIMEOUTS.get(pool="test") == timeouts + 1
+    assert POOL_SATURATION.get(pool="test") == 0
+
+
+def test_pool_keeps_its_label_across_dispose(tiny_pool):
+    checkouts = POOL_CHECKOUTS.get(pool="test")
+    tiny_pool.dispose()
+    with tiny_pool.connect():
+        pass
+    assert POOL_CHECKOUTS.get(pool="test") == checkouts + 1
@@ -0,0 +1,36 @@
+import pytest
+
+from insuremate.services.recent_log import RecentLog
+
+
+def test_in_process_log_keeps_newest_first():
+    log = RecentLog(3)
+    assert log.latest() == []
+    log.extend([{"n": i} for i in range(5)])
+    assert log.latest() == [{"n": 4}, {"n": 3}, {"n": 2}]
+    assert log.latest(1) == [{"n": 4}]
+
+
+def test_file_log_is_shared_between_instances(tmp_path):
+    path = tmp_path / "recent.bin"
+    # Two instances map the file separately, like two server workers
+    first, second = RecentLog(3, path), RecentLog(3, path)
+    first.append({"n": 1})
+    second.extend([{"n": 2}, {"n": 3}, {"n": 4}])
+    first.extend([{"n": i} for i in range(5, 12)])
+    assert first.latest() == second.latest() == [{"n": 11}, {"n": 10}, {"n": 9}]
+
+    # Reopening with the same layout keeps the entries; a new depth gets its own
+    # file and leaves the one still mapped by the first two untouched
+    assert RecentLog(3, path).latest(1) == [{"n": 11}]
+    deeper = RecentLog(5, path)
+    assert deeper.latest() == [] and deeper.path != first.path
+    deeper.append({"n": 12})
+    assert first.latest(1) == [{"n": 11}]
+
+
+def test_file_log_refuses_a_foreign_file(tmp_path):
+    path = tmp_path / "recent.bin"
+    RecentLog(3, path, slot_size=64).path.write_bytes(b"not a log")
+    with pytest.raises(RuntimeError, match="not a recent-predictions log"):
+        RecentLog(3, path, slot_size=64)
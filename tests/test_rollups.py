@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from insuremate.db import session as db_session
+from insuremate.db.base import Base
+from insuremate.db.models import PredictionResult, ResultRollup
+from insuremate.db.rollups import backfill_rollups, rebuild_rollups
+from insuremate.db.writer import IdAllocator, WriteBehindWriter
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(db_session, "SessionLocal", sessionmaker(bind=engine))
+    yield engine
+    engine.dispose()
+
+
+def _buckets():
+    with db_session.SessionLocal() as db:
+        rows = db.execute(select(ResultRollup.day, ResultRollup.predicted_category,
+                                 ResultRollup.city_tier, ResultRollup.count, ResultRollup.bmi_sum))
+        return {tuple(r[:3]): (r[3], round(r[4], 6)) for r in rows}
+
+
+def test_incremental_rollups_match_a_full_rebuild(temp_db):
+    writer = WriteBehindWriter(batch_size=4, flush_interval=10.0, allocator=IdAllocator(block_size=5))
+    start = datetime(2026, 3, 1, 23, 0)
+    for i in range(20):
+        writer.submit(dict(
+            id=writer.allocator.next_id(), age=30, weight=70.0, height=1.75, income_lpa=10.0,
+            smoker=False, city="Pune", occupation="student", bmi=20.0 + i, lifestyle_risk="low",
+            age_group="adult", city_tier=1 + i % 3, predicted_category=("Low", "High")[i % 2],
+            created_at=start + timedelta(minutes=7 * i),  # spans midnight
+        ))
+    writer.stop()
+
+    incremental = _buckets()
+    assert sum(count for count, _ in incremental.values()) == 20
+    assert {day for day, _, _ in incremental} == {start.date(), start.date() + timedelta(days=1)}
+    assert rebuild_rollups() == len(incremental)
+    assert _buckets() == incremental
+
+
+def test_backfill_fills_an_empty_rollup_table_only(temp_db):
+    # Rows from before the rollup table existed: inserted without apply_rollups
+    with db_session.SessionLocal() as db:
+        db.add_all(PredictionResult(
+            age=30, weight=70.0, height=1.75, income_lpa=10.0, smoker=False, city="Pune",
+            occupation="student", bmi=22.0, lifestyle_risk="low", age_group="adult", city_tier=1,
+            predicted_category=category, created_at=datetime(2026, 3, 1, 12, 0),
+        ) for category in ("Low", "Low", "High"))
+        db.commit()
+    assert _buckets() == {}
+
+    assert backfill_rollups(temp_db) == 2
+    assert {key[1]: count for key, (count, _) in _buckets().items()} == {"Low": 2, "High": 1}
+    assert backfill_rollups(temp_db) == 0
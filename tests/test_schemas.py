@@ -0,0 +1,43 @@
+from insuremate.schemas import CITY_TIERS, Userinput, get_city_tier, load_city_tiers
+
+
+def _user(**overrides):
+    data = dict(age=30, weight=95, height=1.7, income_lpa=10, smoker=True, city="Pune", occupation="student")
+    data.update(overrides)
+    return Userinput(**data)
+
+
+def test_city_tiers_load_from_csv(tmp_path):
+    path = tmp_path / "tiers.csv"
+    path.write_text("city,tier\nShimla,2\n Goa ,1\n")
+    assert load_city_tiers(path) == {"Shimla": 2, "Goa": 1}
+    assert CITY_TIERS["Mumbai"] == 1 and get_city_tier("Indore") == 2
+    assert get_city_tier("Nowhere") == 3
+
+
+def test_derived_fields_follow_field_changes():
+    user = _user()
+    assert (user.lifestyle_risk, user.age_group, user.city_tier) == ("high", "adult", 1)
+
+    user.smoker = False
+    user.city = "Nowhere"
+    assert (user.lifestyle_risk, user.city_tier) == ("low", 3)
+    older = user.model_copy(update={"age": 70})
+    assert (older.age_group, user.age_group) == ("senior", "adult")
+    assert user.model_dump()["city_tier"] == 3
+
+
+def test_seeded_rows_derive_fields_like_userinput():
+    from benchmarks.seed import generate_rows
+
+    for row in generate_rows(500, seed=3):
+        user = Userinput(**{name: row[name] for name in Userinput.model_fields})
+        assert (row["lifestyle_risk"], row["age_group"]) == (user.lifestyle_risk, user.age_group)
+
+
+def test_equality_ignores_which_derived_fields_were_read():
+    read, unread = _user(), _user()
+    assert (read.bmi, read.city_tier) == (unread.weight / unread.height ** 2, 1)
+    assert "bmi" in read.__dict__ and "bmi" not in unread.__dict__
+    assert read == unread
+    assert read != _user(age=31)
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from insuremate.services.singleflight import SINGLEFLIGHT_CALLS, SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight("test-share")
+    calls = []
+
+    async def query(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return [key]
+
+    async def main():
+        results = await asyncio.gather(*(flight.do(k, lambda k=k: query(k)) for k in ("a", "a", "a", "b")))
+        assert results == [["a"], ["a"], ["a"], ["b"]] and results[0] is results[1]
+        # Nothing is cached once the call has finished
+        await flight.do("a", lambda: query("a"))
+
+    asyncio.run(main())
+    assert calls == ["a", "b", "a"] and len(flight) == 0
+    assert SINGLEFLIGHT_CALLS.get(group="test-share", outcome="coalesced") == 2
+    assert SINGLEFLIGHT_CALLS.get(group="test-share", outcome="leader") == 3
+
+
+def test_errors_reach_every_caller_and_cancelling_the_leader_spares_the_rest():
+    flight = SingleFlight("test-errors")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def main():
+        outcomes = await asyncio.gather(flight.do("k", failing), flight.do("k", failing),
+                                        return_exceptions=True)
+        assert all(isinstance(e, RuntimeError) for e in outcomes)
+
+        leader = asyncio.ensure_future(flight.do("s", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("s", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "ok"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(main())